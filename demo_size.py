@@ -1,40 +1,86 @@
 import os
+import sys
+import pandas as pd
 import matplotlib.pyplot as plt
 from collections import defaultdict
+from scene_org_mirror import load_mirror_index, save_mirror_index, scan_mirror
 
 BASE_DIR = r"X:\ftp.scene.org\parties"
 STATS_DIR = "stats"
+# Per-directory listing (file sizes) keyed by directory mtime, only changed directories are listed again
+SCAN_CACHE_FILE = os.path.join(STATS_DIR, "_parties_scan_cache.json.gz")
+SCAN_WORKERS = 16
+CUBE_FILE = os.path.join(STATS_DIR, "parties_cube.csv.gz")
+TOP_PARTIES = 30
+TOP_EXTENSIONS = 10
 os.makedirs(STATS_DIR, exist_ok=True)
 
-# Data containers
-year_party_count = {}
-year_file_count = defaultdict(int)
-year_total_size = defaultdict(int)
 
-for year_name in sorted(os.listdir(BASE_DIR)):
-    year_path = os.path.join(BASE_DIR, year_name)
-    if not os.path.isdir(year_path):
-        continue
+def build_cube(index):
+    # Year x party x file extension cube, built in a single pass over the scan index
+    cube = defaultdict(lambda: [0, 0])
+    party_folders = set()
+    for rel_dir, entry in index["dirs"].items():
+        parts = rel_dir.split("/")
+        if len(parts) < 2:
+            continue
+        try:
+            year = int(parts[0])
+        except ValueError:
+            continue
+
+        party = parts[1]
+        party_folders.add((year, party))
+        for name, (size, _) in entry["files"].items():
+            extension = os.path.splitext(name)[1].lower().lstrip(".") or "(none)"
+            cell = cube[(year, party, extension)]
+            cell[0] += 1
+            cell[1] += size
+
+    # Keep empty party folders, they still count as parties
+    non_empty_parties = {(year, party) for year, party, _ in cube}
+    rows = [(year, party, extension, count, size) for (year, party, extension), (count, size) in cube.items()]
+    rows += [(year, party, "", 0, 0) for year, party in party_folders - non_empty_parties]
+
+    df = pd.DataFrame(rows, columns=["year", "party", "extension", "files", "bytes"])
+    df = df.astype({"year": "int16", "files": "int32", "bytes": "int64"})
+    return df.sort_values(["year", "party", "extension"]).reset_index(drop=True)
+
+
+def load_cube():
+    return pd.read_csv(CUBE_FILE, keep_default_na=False, dtype={"party": str, "extension": str})
+
+
+if "--from-cube" in sys.argv and os.path.exists(CUBE_FILE):
+    # Render the charts again without touching the archive
+    cube = load_cube()
+else:
+    # Scan the archive, in parallel, reusing the previous run when possible
     try:
-        year = int(year_name)
-    except ValueError:
-        continue
-
-    party_folders = [f for f in os.listdir(year_path) if os.path.isdir(os.path.join(year_path, f))]
-    year_party_count[year] = len(party_folders)
-
-    for party in party_folders:
-        party_path = os.path.join(year_path, party)
-        for root, _, files in os.walk(party_path):
-            for file in files:
-                try:
-                    full_path = os.path.join(root, file)
-                    year_file_count[year] += 1
-                    year_total_size[year] += os.path.getsize(full_path)
-                except OSError:
-                    continue
-
-year_total_size_mb = {year: size / (1024 * 1024) for year, size in year_total_size.items()}
+        index = scan_mirror(BASE_DIR, load_mirror_index(SCAN_CACHE_FILE), SCAN_WORKERS)
+    except OSError as e:
+        print(f"Cannot scan {BASE_DIR}: {e}")
+        index = None
+
+    cube = build_cube(index) if index is not None else None
+    if index is not None and not index.get("incomplete") and len(cube) > 0:
+        # A partial scan never replaces the cache, the next run would have to list everything again
+        save_mirror_index(index, SCAN_CACHE_FILE)
+        cube.to_csv(CUBE_FILE, index=False)
+        print(f"Cube saved to {CUBE_FILE} ({len(cube)} rows)")
+    elif os.path.exists(CUBE_FILE):
+        # Failed, partial or empty scan: the charts are rendered from the previous complete one
+        print(f"Scan failed or incomplete, using the previous cube {CUBE_FILE}")
+        cube = load_cube()
+
+if cube is None or cube["files"].sum() == 0:
+    print("No demoparty files found, no chart rendered.")
+    sys.exit(1)
+
+per_year = cube.groupby("year").agg(parties=("party", "nunique"), files=("files", "sum"), bytes=("bytes", "sum"))
+year_party_count = per_year["parties"].to_dict()
+year_file_count = per_year["files"].to_dict()
+year_total_size_mb = (per_year["bytes"] / (1024 * 1024)).to_dict()
 
 # Sort all years
 all_years = sorted(set(year_party_count) | set(year_file_count) | set(year_total_size_mb))
@@ -76,3 +122,37 @@ plt.savefig(os.path.join(STATS_DIR, "demoparty_stats_combined.png"))
 plt.close()
 
 print("✅ Combined stats chart saved to stats/demoparty_stats_combined.png")
+
+# Per-party chart: the largest party archives
+party_sizes = cube.groupby(["year", "party"])["bytes"].sum().nlargest(TOP_PARTIES) / (1024 * 1024)
+labels = [f"{party} ({year})" for year, party in party_sizes.index]
+
+plt.figure(figsize=(14, 8))
+plt.barh(labels[::-1], party_sizes.values[::-1], color='steelblue')
+plt.xlabel('Total Size (MB)')
+plt.title(f'Demoparty Archives: {TOP_PARTIES} Largest Parties')
+plt.tight_layout()
+plt.savefig(os.path.join(STATS_DIR, "demoparty_top_parties.png"))
+plt.close()
+
+print("✅ Per-party chart saved to stats/demoparty_top_parties.png")
+
+# Per-format chart: share of each file type per year
+files_only = cube[cube["extension"] != ""]
+top_extensions = files_only.groupby("extension")["bytes"].sum().nlargest(TOP_EXTENSIONS).index
+extension_sizes = files_only.assign(
+    extension=files_only["extension"].where(files_only["extension"].isin(top_extensions), "other")
+).pivot_table(index="year", columns="extension", values="bytes", aggfunc="sum", fill_value=0) / (1024 * 1024)
+
+fig, ax = plt.subplots(figsize=(14, 6))
+ax.stackplot(extension_sizes.index, extension_sizes.T.values, labels=extension_sizes.columns)
+ax.set_xlabel('Year')
+ax.set_ylabel('Total Size (MB)')
+ax.set_title('Demoparty Archives: Total Size per File Type and Year')
+ax.legend(loc='upper left')
+ax.grid(True)
+plt.tight_layout()
+plt.savefig(os.path.join(STATS_DIR, "demoparty_file_types.png"))
+plt.close()
+
+print("✅ Per-format chart saved to stats/demoparty_file_types.png")
@@ -1,14 +1,33 @@
+import io
 import os
+import sys
 import json
 import requests
 import gzip
-import shutil
+import hashlib
+import pouet_delta
+import pouet_prods_sqlite
+import pouet_prods_columnar
+import scene_org_mirror
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from scene_org_links import SCENE_ORG_FTP_ROOT, SCENE_ORG_HTTP_ROOT, build_link_remapper
 
-SCENE_ORG_FTP_ROOT = "ftp://ftp.scene.org/"
-SCENE_ORG_HTTP_ROOT = "https://files.scene.org/view/"
+try:
+    import ijson  # Optional: C-backed streaming JSON parser
+except ImportError:
+    ijson = None
 
+try:
+    import orjson  # Optional: fast JSON serializer for the platform exports
+except ImportError:
+    orjson = None
 
-def fetch_data():
+STREAM_CHUNK_SIZE = 1024 * 1024
+# (connect, read) timeouts of the dump download: a stalled transfer fails and is resumed on the next run
+DOWNLOAD_TIMEOUT = (30, 120)
+
+
+def fetch_latest_dumps():
     try:
         response = requests.get('https://data.pouet.net/json.php')
         response.raise_for_status()  # Did the request failed ?
@@ -26,61 +45,346 @@ def fetch_data():
         return None
 
     latest_date = max(dumps.keys())
-    prods_url = dumps[latest_date]['prods']['url']
-    filename = "_tmp/" + dumps[latest_date]['prods']['filename']
+    return dumps[latest_date]
+
+
+def _dump_expected_size(dump_info):
+    size = dump_info.get('size_in_bytes', dump_info.get('size'))
+    return int(size) if size is not None else None
+
+
+def _dump_expected_hash(dump_info):
+    # The index may or may not publish a checksum, use the strongest one available
+    for algorithm in ('sha256', 'sha1', 'md5'):
+        if dump_info.get(algorithm):
+            return algorithm, dump_info[algorithm].lower()
+    return None, None
+
+
+def _file_hash(filename, algorithm):
+    hasher = hashlib.new(algorithm)
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(STREAM_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _is_valid_dump_file(filename, dump_info):
+    expected_size = _dump_expected_size(dump_info)
+    if expected_size is not None and os.path.getsize(filename) != expected_size:
+        print(f"Size mismatch for {filename}: {os.path.getsize(filename)} bytes, expected {expected_size}.")
+        return False
+    algorithm, expected_hash = _dump_expected_hash(dump_info)
+    if algorithm and _file_hash(filename, algorithm) != expected_hash:
+        print(f"{algorithm} mismatch for {filename}.")
+        return False
+    return True
+
+
+def download_dump(dump_info, folder='_tmp'):
+    # Downloads one dump file described by the json.php index, unless it is already cached.
+    # The file is written to `<filename>.part` first, so an interrupted download is resumed
+    # with a HTTP Range request on the next run, and only renamed once verified.
+    filename = os.path.join(folder, dump_info['filename'])
+    partial_filename = filename + '.part'
+    expected_size = _dump_expected_size(dump_info)
+
+    if os.path.exists(filename):
+        if expected_size is None or os.path.getsize(filename) == expected_size:
+            print(f"Dump already cached : {filename}")
+            return filename
+        os.remove(filename)
+
+    os.makedirs(folder, exist_ok=True)
+    offset = os.path.getsize(partial_filename) if os.path.exists(partial_filename) else 0
+    if expected_size is not None and offset > expected_size:
+        offset = 0
+
     try:
-        response = requests.get(prods_url, stream=True)
-        response.raise_for_status()
-        os.makedirs('_tmp', exist_ok=True)
-        with open(filename, 'wb') as out_file:
-            shutil.copyfileobj(response.raw, out_file)
+        if expected_size is None or offset < expected_size:
+            headers = {'Range': f'bytes={offset}-'} if offset else {}
+            response = requests.get(dump_info['url'], headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT)
+            if response.status_code == 416:
+                # Nothing left to fetch, the partial file is probably complete
+                response.close()
+            else:
+                response.raise_for_status()
+                if offset and response.status_code == 206:
+                    print(f"Resuming download of {filename} at byte {offset}...")
+                    mode = 'ab'
+                else:
+                    mode = 'wb'
+                # iter_content raises requests exceptions (not urllib3 ones) when the connection
+                # drops or stalls, the bytes already written are kept for the next resume
+                with open(partial_filename, mode) as out_file:
+                    for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                        out_file.write(chunk)
     except requests.RequestException as e:
         print(f"Error while downloading : {e}")
         return None
+
+    if not _is_valid_dump_file(partial_filename, dump_info):
+        os.remove(partial_filename)
+        return None
+
+    os.replace(partial_filename, filename)
     return filename
 
 
-def parse_and_classify(filename, platforms, scene_org_local_copy, scene_org_roots):
+def fetch_data():
+    latest_dumps = fetch_latest_dumps()
+    if not latest_dumps:
+        return None
+    return download_dump(latest_dumps['prods'])
+
+
+def _iter_json_array_items(f, key):
+    # Minimal pure-Python streaming reader: walks the top-level object key by key
+    # and decodes the items of the array stored under `key` one at a time, so only
+    # the current item (plus one read chunk) is ever held in memory.
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = f.read(STREAM_CHUNK_SIZE)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buffer) or not fill():
+                return
+
+    def expect(chars):
+        nonlocal pos
+        skip_whitespace()
+        if pos >= len(buffer) or buffer[pos] not in chars:
+            found = buffer[pos] if pos < len(buffer) else "EOF"
+            raise ValueError(f"Unexpected '{found}' while looking for '{chars}'")
+        pos += 1
+        return buffer[pos - 1]
+
+    def decode_value():
+        nonlocal pos
+        skip_whitespace()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Value is probably cut by the chunk boundary
+                if eof or not fill():
+                    raise
+                continue
+            if end == len(buffer) and not eof and fill():
+                # A number could continue in the next chunk
+                continue
+            pos = end
+            return value
+
+    expect("{")
+    skip_whitespace()
+    if pos < len(buffer) and buffer[pos] == "}":
+        return
+    while True:
+        name = decode_value()
+        expect(":")
+        if name == key:
+            expect("[")
+            skip_whitespace()
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+            while True:
+                yield decode_value()
+                if expect(",]") == "]":
+                    return
+        decode_value()
+        if expect(",}") == "}":
+            return
+
+
+def iter_dump_items(filename, key, json_backend=None):
+    # Yields the items of the `key` array of a gzipped Pouet dump, one at a time.
+    # Uses ijson when installed (`json_backend` picks one of its backends, e.g. "yajl2_c"),
+    # otherwise falls back to the pure-Python streaming reader above.
+    with gzip.open(filename, 'rb') as f:
+        if ijson is not None:
+            backend = ijson.get_backend(json_backend) if json_backend else ijson
+            yield from backend.items(f, f"{key}.item", use_float=True)
+        else:
+            if json_backend:
+                print(f"ijson is not installed, ignoring JSON backend '{json_backend}'.")
+            yield from _iter_json_array_items(io.TextIOWrapper(f, encoding='utf-8'), key)
+
+
+def iter_prods(filename, json_backend=None):
+    return iter_dump_items(filename, 'prods', json_backend)
+
+
+def parse_and_classify(filename, platforms, scene_org_local_copy, scene_org_roots, json_backend=None, mirror_lookup=None):
+    platform_dict = {platform: [] for platform in platforms}
+    # Remap ftp.scene.org -> local backup
+    remap_link = build_link_remapper(scene_org_local_copy, scene_org_roots)
     try:
-        with gzip.open(filename, 'rt') as f:
-            data = json.load(f)
+        for prod in iter_prods(filename, json_backend):
+            if 'download' in prod:
+                local_link = remap_link(prod['download'])
+                if local_link:
+                    prod['local_link'] = local_link
+                    if mirror_lookup is not None:
+                        prod['local_status'] = scene_org_mirror.check_local_link(local_link, mirror_lookup)
+
+            for platform_key in prod.get('platforms', {}):
+                platform = prod['platforms'][platform_key]
+                if platform.get('name') in platforms:
+                    platform_dict[platform['name']].append(prod)
     except Exception as e:
         print(f"Error reading gzip file: {e}")
         return {}
-
-    platform_dict = {platform: [] for platform in platforms}
-    for prod in data.get('prods', []):
-        if 'download' in prod:
-            # Remap ftp.scene.org -> local backup
-            if SCENE_ORG_FTP_ROOT in prod['download']:
-                for mirror_root in scene_org_roots:
-                    if SCENE_ORG_FTP_ROOT + mirror_root in prod['download']:
-                        local_link = prod['download'].replace(SCENE_ORG_FTP_ROOT + mirror_root, scene_org_local_copy)
-                        prod['local_link'] = local_link.replace("/", "\\")
-            elif SCENE_ORG_HTTP_ROOT in prod['download']:
-                local_link = prod['download'].replace(SCENE_ORG_HTTP_ROOT, scene_org_local_copy)
-                prod['local_link'] = local_link.replace("/", "\\")
-
-        for platform_key in prod.get('platforms', {}):
-            platform = prod['platforms'][platform_key]
-            if platform.get('name') in platforms:
-                platform_dict[platform['name']].append(prod)
     return platform_dict
 
 
-def save_platform_data(platform_dict):
+def platform_filename(platform, output_format="json"):
+    extension = "jsonl" if output_format == "jsonl" else "json"
+    return f"db/{platform.replace('/', '_').replace(' ', '_').lower()}.{extension}"
+
+
+def _write_platform_file(filename, prods, output_format="json", fast_json=False):
+    # output_format: "json" (indented, as before), "compact" (no indentation) or "jsonl" (one prod per line).
+    # The file is written next to its destination and renamed once complete,
+    # so a crash never leaves a half-written platform file behind.
+    tmp_filename = filename + '.tmp'
+    try:
+        if fast_json and orjson is not None:
+            # orjson writes UTF-8 instead of escaping non-ASCII characters
+            with open(tmp_filename, 'wb') as f:
+                if output_format == "jsonl":
+                    for prod in prods:
+                        f.write(orjson.dumps(prod) + b"\n")
+                else:
+                    f.write(orjson.dumps(prods, option=orjson.OPT_INDENT_2 if output_format == "json" else 0))
+        else:
+            with open(tmp_filename, 'w') as f:
+                if output_format == "jsonl":
+                    for prod in prods:
+                        f.write(json.dumps(prod, separators=(',', ':')) + "\n")
+                elif output_format == "compact":
+                    json.dump(prods, f, separators=(',', ':'))
+                else:
+                    json.dump(prods, f, indent=2)
+        os.replace(tmp_filename, filename)
+    except Exception:
+        # No half-written .tmp file left behind
+        if os.path.exists(tmp_filename):
+            try:
+                os.remove(tmp_filename)
+            except OSError:
+                pass
+        raise
+    return filename
+
+
+def save_platform_data(platform_dict, only_platforms=None, output_format="json", fast_json=False, workers=None):
+    # Platforms are serialized in a process pool: the indented json encoder is pure Python,
+    # threads would keep waiting for each other on the GIL.
+    # Returns the set of platforms whose file could not be written.
     os.makedirs('db', exist_ok=True)
-    for platform, prods in platform_dict.items():
-        filename = f"db/{platform.replace('/', '_').replace(' ', '_').lower()}.json"
-        with open(filename, 'w') as f:
-            json.dump(prods, f, indent=2)
-        print(f"Exported : {filename}")
+    failed_platforms = set()
+    if fast_json and orjson is None:
+        print("orjson is not installed, using the standard json module.")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_write_platform_file, platform_filename(platform, output_format), prods, output_format, fast_json): platform
+            for platform, prods in platform_dict.items()
+            if only_platforms is None or platform in only_platforms
+        }
+        for future in as_completed(futures):
+            try:
+                print(f"Exported : {future.result()}")
+            except Exception as e:
+                print(f"Error while exporting {futures[future]}: {e}")
+                failed_platforms.add(futures[future])
+    return failed_platforms
+
 
+def unique_prods(platform_dict):
+    # A prod released on several platforms is listed in each of them
+    seen = set()
+    for prods in platform_dict.values():
+        for prod in prods:
+            if prod.get('id') not in seen:
+                seen.add(prod.get('id'))
+                yield prod
 
-def fetch_pouet_prods(platforms, scene_org_local_copy, scene_org_roots):
+
+def save_platform_data_delta(platform_dict, dump_name, output_format="json", fast_json=False):
+    # Compares the new dump with the previous export by prod id and content hash,
+    # rewrites only the platform files that changed and appends the changes feed.
+    previous_state = pouet_delta.load_prods_state()
+    new_state, prods_by_id = pouet_delta.build_prods_state(platform_dict)
+    delta = pouet_delta.compute_prods_delta(previous_state, new_state)
+    pouet_delta.print_delta_report(delta)
+
+    dirty_platforms = {
+        platform for platform in platform_dict
+        if platform in delta['dirty_platforms'] or not os.path.exists(platform_filename(platform, output_format))
+    }
+    failed_platforms = save_platform_data(platform_dict, only_platforms=dirty_platforms, output_format=output_format, fast_json=fast_json)
+    if failed_platforms:
+        # The prods of the platform files not written keep their previous state,
+        # so these files are rewritten (and the changes reported) on the next run
+        delta, new_state = pouet_delta.defer_failed_platforms(delta, previous_state, new_state, failed_platforms)
+        print(f"{len(failed_platforms)} platform file(s) not written, will be retried on the next run.")
+    if previous_state:
+        pouet_delta.append_changes_feed(delta, new_state, prods_by_id, dump_name)
+    else:
+        # First delta run: the state is a snapshot to compare the next dumps with, the feed
+        # only starts with the next run (instead of listing every prod as "added")
+        print("No previous export state, the changes feed starts with the next run.")
+    pouet_delta.save_prods_state(new_state)
+    return delta
+
+
+def fetch_pouet_prods(platforms, scene_org_local_copy, scene_org_roots, json_backend=None, delta=False, verify_links=False,
+                      sqlite_export=False, columnar_export=False, output_format="json", fast_json=False):
     filename = fetch_data()
-    platform_dict = parse_and_classify(filename, platforms, scene_org_local_copy, scene_org_roots)
-    save_platform_data(platform_dict)
+    if not filename:
+        return
+
+    mirror_lookup = None
+    if verify_links:
+        if os.path.isdir(scene_org_local_copy):
+            # Only the directories whose mtime changed since the previous run are listed again
+            try:
+                mirror_index = scene_org_mirror.update_mirror_index(scene_org_local_copy)
+                mirror_lookup = scene_org_mirror.build_mirror_lookup(mirror_index)
+            except OSError as e:
+                print(f"Cannot scan local copy {scene_org_local_copy}, links won't be verified: {e}")
+        else:
+            print(f"Local copy {scene_org_local_copy} not found, links won't be verified.")
+
+    platform_dict = parse_and_classify(filename, platforms, scene_org_local_copy, scene_org_roots, json_backend, mirror_lookup)
+    if not platform_dict:
+        return
+    if mirror_lookup is not None:
+        scene_org_mirror.print_link_report(platform_dict)
+    if delta:
+        save_platform_data_delta(platform_dict, os.path.basename(filename), output_format, fast_json)
+    else:
+        save_platform_data(platform_dict, output_format=output_format, fast_json=fast_json)
+    if sqlite_export:
+        pouet_prods_sqlite.export_prods_sqlite(unique_prods(platform_dict))
+    if columnar_export:
+        pouet_prods_columnar.export_prods_columnar(unique_prods(platform_dict))
 
 
 def fetch_platforms():
@@ -108,4 +412,9 @@ if __name__ == "__main__":
 
     scene_org_local_copy = "X:\\ftp.scene.org\\"
     scene_org_roots = ["mirrors/hornet/", "pub/"]
-    fetch_pouet_prods(platforms, scene_org_local_copy, scene_org_roots)
\ No newline at end of file
+    # Opt-in modes: --delta, --verify-links, --sqlite, --columnar
+    fetch_pouet_prods(platforms, scene_org_local_copy, scene_org_roots,
+                      delta="--delta" in sys.argv,
+                      verify_links="--verify-links" in sys.argv,
+                      sqlite_export="--sqlite" in sys.argv,
+                      columnar_export="--columnar" in sys.argv)
\ No newline at end of file
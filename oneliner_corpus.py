@@ -0,0 +1,344 @@
+import os
+import re
+import json
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from oneliner_store import ONELINER_STORE_FILE, OnelinerStore, iter_store_records
+
+try:
+    import pyarrow  # Optional: enables the Parquet cache (pickle otherwise)
+except ImportError:
+    pyarrow = None
+
+ONELINER_FOLDER = "./pouet_oneliners"
+CACHE_FOLDER = "./stats"
+CACHE_BASENAME = "_oneliners_cache"
+STORE_CACHE_BASENAME = "_oneliners_store_cache"
+
+# Regex for valid oneliner lines
+line_regex = re.compile(r"^(\d{2}:\d{2})\s+(.*?)\[(\d+)\]\s+:\s+(.*)$")
+date_regex = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+COLUMNS = ["datetime", "nickname", "pouet_id", "message", "page"]
+PAGES_PER_CHUNK = 250
+
+# Calendar periods, as integer codes computed from the datetime column on demand
+PERIODS = ["day", "week", "month", "year"]
+
+
+def parse_page_file(path, current_date=None):
+    # Parses one page of pouet_oneliners/, returns the date context at the end of the page
+    # and a list of (date, minute of the day, nickname, pouet_id, message).
+    # Lines before the first date header belong to `current_date` (the last date of the
+    # previous page), None if it is unknown.
+    rows = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if date_regex.match(line):
+                current_date = line
+            else:
+                match = line_regex.match(line)
+                if match:
+                    time_text, nickname, pouet_id, message = match.groups()
+                    minutes = int(time_text[:2]) * 60 + int(time_text[3:])
+                    rows.append((current_date, minutes, nickname, int(pouet_id), message))
+    return current_date, rows
+
+
+def parse_pages_chunk(input_folder, filenames):
+    # Worker: parses pages and returns columnar arrays (not a list of dicts), cheap to send
+    # back to the main process. The date context is carried from one page to the next one only;
+    # lines before the first date of a chunk, or of a page following a gap (incremental reload),
+    # get a NaT day, filled once every page is back in order.
+    current_date = None
+    previous_page = None
+    days, minutes, nicknames, pouet_ids, messages, pages = [], [], [], [], [], []
+    for filename in filenames:
+        page = _page_number(filename)
+        if previous_page is None or page != previous_page + 1:
+            current_date = None
+        previous_page = page
+        current_date, rows = parse_page_file(os.path.join(input_folder, filename), current_date)
+        for date, minute, nickname, pouet_id, message in rows:
+            days.append(date or "NaT")
+            minutes.append(minute)
+            nicknames.append(nickname)
+            pouet_ids.append(pouet_id)
+            messages.append(message)
+            pages.append(page)
+    return {
+        "day": np.array(days, dtype="datetime64[D]"),
+        "minutes": np.array(minutes, dtype=np.int16),
+        "nickname": np.array(nicknames, dtype=object),
+        "pouet_id": np.array(pouet_ids, dtype=np.int32),
+        "message": np.array(messages, dtype=object),
+        "page": np.array(pages, dtype=np.int32),
+    }
+
+
+def _page_number(filename):
+    name = filename.split(".")[0]
+    return int(name) if name.isdigit() else -1
+
+
+def _list_pages(input_folder):
+    # {filename: [size, mtime]}, the cache key of every page
+    pages = {}
+    with os.scandir(input_folder) as it:
+        for entry in it:
+            if entry.name.endswith(".txt") and entry.is_file():
+                st = entry.stat()
+                pages[entry.name] = [st.st_size, st.st_mtime_ns]
+    return pages
+
+
+def _cache_paths(cache_folder, basename=CACHE_BASENAME):
+    extension = "parquet" if pyarrow is not None else "pkl"
+    base = os.path.join(cache_folder, basename)
+    return base + "." + extension, base + ".json"
+
+
+def _read_cache(cache_folder, basename=CACHE_BASENAME):
+    data_file, manifest_file = _cache_paths(cache_folder, basename)
+    if not (os.path.exists(data_file) and os.path.exists(manifest_file)):
+        return None, {}
+    try:
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        df = pd.read_parquet(data_file) if pyarrow is not None else pd.read_pickle(data_file)
+        return df, manifest
+    except Exception as e:
+        print(f"Cannot read the oneliner cache, rebuilding it: {e}")
+        return None, {}
+
+
+def _write_cache(cache_folder, df, manifest, basename=CACHE_BASENAME):
+    os.makedirs(cache_folder, exist_ok=True)
+    data_file, manifest_file = _cache_paths(cache_folder, basename)
+    if pyarrow is not None:
+        df.to_parquet(data_file + ".tmp", index=False)
+    else:
+        df.to_pickle(data_file + ".tmp")
+    os.replace(data_file + ".tmp", data_file)
+    # The manifest is written last: a crash in between only forces a rebuild
+    with open(manifest_file + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(manifest_file + ".tmp", manifest_file)
+
+
+def parse_pages(input_folder, filenames, workers=None):
+    # Pages are split into chunks of consecutive pages, parsed in a process pool,
+    # then concatenated in page order. With the "spawn" start method (Windows, macOS), the
+    # workers import the calling script again: its code must be under a __main__ guard.
+    chunks = [filenames[i:i + PAGES_PER_CHUNK] for i in range(0, len(filenames), PAGES_PER_CHUNK)]
+    if len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(parse_pages_chunk, [input_folder] * len(chunks), chunks))
+    else:
+        results = [parse_pages_chunk(input_folder, chunk) for chunk in chunks]
+
+    columns = {
+        name: np.concatenate([result[name] for result in results]) if results else np.array([])
+        for name in ["day", "minutes", "nickname", "pouet_id", "message", "page"]
+    }
+    return pd.DataFrame(columns)
+
+
+def _resolve_datetimes(df):
+    # Rows whose date is unknown (before the first date header of a parsed chunk) take the
+    # date of the previous row, in page order; rows before any date at all are dropped
+    day = df["day"].ffill()
+    df = df.assign(datetime=day + pd.to_timedelta(df["minutes"].astype("int64"), unit="m"))
+    df = df[df["datetime"].notna()]
+    return df[COLUMNS].reset_index(drop=True)
+
+
+def compact_oneliners(df):
+    # Compact layout: datetime64 timestamps, int32 ids and pages, categorical nicknames
+    # (a few thousand distinct values for millions of rows). Messages stay Python strings.
+    return df.astype({
+        "datetime": "datetime64[ns]",
+        "nickname": "category",
+        "pouet_id": np.int32,
+        "page": np.int32,
+    })
+
+
+def memory_usage_mb(df):
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+
+def period_codes(df, period):
+    # Integer code of the calendar period of every message, instead of a column of
+    # datetime.date or Period objects:
+    # day = days since 1970-01-01, week = weeks since Monday 1969-12-29,
+    # month = months since 1970-01, year = the year itself
+    values = df["datetime"].values
+    if period == "day":
+        return values.astype("datetime64[D]").astype(np.int32)
+    if period == "week":
+        return (values.astype("datetime64[D]").astype(np.int32) + 3) // 7
+    if period == "month":
+        return values.astype("datetime64[M]").astype(np.int32)
+    if period == "year":
+        return df["datetime"].dt.year.values.astype(np.int32)
+    raise ValueError(f"Unknown period {period}, expected one of {PERIODS}")
+
+
+def period_start(codes, period):
+    # First day of the periods given by period_codes, as datetime64 (e.g. for chart axes)
+    codes = np.asarray(codes, dtype=np.int64)
+    if period == "day":
+        return pd.to_datetime(codes.astype("datetime64[D]"))
+    if period == "week":
+        return pd.to_datetime((codes * 7 - 3).astype("datetime64[D]"))
+    if period == "month":
+        return pd.to_datetime(codes.astype("datetime64[M]"))
+    if period == "year":
+        return pd.to_datetime((codes - 1970).astype("datetime64[Y]"))
+    raise ValueError(f"Unknown period {period}, expected one of {PERIODS}")
+
+
+def top_users_by_period(df, period=None, n=20):
+    # Top n most active users of every period, in one groupby pass over the whole corpus.
+    # `period` is one of PERIODS, or an array of period keys (one per message); None is the
+    # global top. Returns a tidy table: period, rank (1 = most active), pouet_id, count.
+    if period is None:
+        keys = np.zeros(len(df), dtype=np.int32)
+    elif isinstance(period, str):
+        keys = period_codes(df, period)
+    else:
+        keys = np.asarray(period)
+    counts = (
+        pd.DataFrame({"period": keys, "pouet_id": df["pouet_id"].values})
+        .groupby(["period", "pouet_id"], sort=False)
+        .size()
+        .reset_index(name="count")
+    )
+    # Most active first inside each period, ties broken by user id
+    counts = counts.sort_values(["period", "count", "pouet_id"], ascending=[True, False, True])
+    top = counts.groupby("period", sort=False).head(n).copy()
+    top["rank"] = top.groupby("period", sort=False).cumcount() + 1
+    return top[["period", "rank", "pouet_id", "count"]].reset_index(drop=True)
+
+
+def load_text_pages(input_folder=ONELINER_FOLDER, cache_folder=CACHE_FOLDER, workers=None):
+    # Every message of the pouet_oneliners/ text pages, in page order. Pages are parsed once and
+    # cached; the cache key of each page is its filename, size and mtime, so only new or modified
+    # pages are parsed again.
+    start_time = time.time()
+    pages = _list_pages(input_folder)
+    cached_df, manifest = _read_cache(cache_folder)
+
+    unchanged = [filename for filename, key in pages.items() if manifest.get(filename) == key]
+    changed = sorted((filename for filename in pages if manifest.get(filename) != pages[filename]), key=_page_number)
+    removed = [filename for filename in manifest if filename not in pages]
+
+    if cached_df is not None and not changed and not removed:
+        df = compact_oneliners(cached_df)
+    else:
+        parts = []
+        if cached_df is not None:
+            unchanged_pages = {_page_number(filename) for filename in unchanged}
+            kept_df = cached_df[cached_df["page"].isin(unchanged_pages)]
+            # Cached rows provide the date context of the pages parsed again
+            parts.append(kept_df.assign(
+                day=kept_df["datetime"].dt.floor("D"),
+                minutes=(kept_df["datetime"].dt.hour * 60 + kept_df["datetime"].dt.minute).astype(np.int16)
+            ))
+        if changed:
+            print(f"Parsing {len(changed)} oneliner page(s)...")
+            parts.append(parse_pages(input_folder, changed, workers))
+        df = pd.concat(parts, ignore_index=True) if parts else parse_pages(input_folder, [])
+        # Stable sort: the order of the messages inside a page is kept
+        df = df.sort_values("page", kind="stable").reset_index(drop=True)
+        df = _resolve_datetimes(df)
+        print(f"Oneliners memory usage: {memory_usage_mb(df):.1f} MB before compaction")
+        df = compact_oneliners(df)
+        _write_cache(cache_folder, df, pages)
+
+    print(f"Loaded {len(df)} oneliners from {len(pages)} pages in {time.time() - start_time:.2f}s "
+          f"({memory_usage_mb(df):.1f} MB)")
+    return df
+
+
+def load_store(store_file=ONELINER_STORE_FILE, cache_folder=CACHE_FOLDER):
+    # The typed records of oneliner_store.py as a compact DataFrame, in page order (None if there
+    # is no store). The store is read again only when its size or mtime changed.
+    if not os.path.exists(store_file):
+        return None
+    st = os.stat(store_file)
+    manifest = {"store": [os.path.abspath(store_file), st.st_size, st.st_mtime_ns]}
+    cached_df, cached_manifest = _read_cache(cache_folder, STORE_CACHE_BASENAME)
+    if cached_df is not None and cached_manifest == manifest:
+        return compact_oneliners(cached_df)
+
+    start_time = time.time()
+    datetimes, nicknames, pouet_ids, messages, pages = [], [], [], [], []
+    for record in iter_store_records(store_file):
+        datetimes.append(record["datetime"])
+        nicknames.append(record["nickname"])
+        pouet_ids.append(record["user_id"])
+        messages.append(record["message"])
+        pages.append(record["page"])
+    df = pd.DataFrame({
+        "datetime": pd.to_datetime(datetimes, format="%Y-%m-%d %H:%M:%S", errors="coerce"),
+        "nickname": nicknames,
+        "pouet_id": np.array(pouet_ids, dtype=np.int32),
+        "message": np.array(messages, dtype=object),
+        "page": np.array(pages, dtype=np.int32)
+    })
+    df = df[df["datetime"].notna()]
+    # Records are appended in page order, but a page fetched again (sync) adds its new messages later
+    df = compact_oneliners(df.sort_values(["page", "datetime"], kind="stable").reset_index(drop=True))
+    _write_cache(cache_folder, df, manifest, STORE_CACHE_BASENAME)
+    print(f"Read {len(df)} typed oneliners from {store_file} in {time.time() - start_time:.2f}s")
+    return df
+
+
+def load_oneliners(input_folder=ONELINER_FOLDER, cache_folder=CACHE_FOLDER, workers=None,
+                   store_file=ONELINER_STORE_FILE):
+    # Returns every oneliner message as a compact DataFrame (datetime, nickname, pouet_id, message, page),
+    # in page order. The typed store (exact timestamps) is used for the pages it holds, the
+    # text pages only for the pages it does not hold yet (see backfill_store).
+    text_df = load_text_pages(input_folder, cache_folder, workers) if os.path.isdir(input_folder) else None
+    store_df = load_store(store_file, cache_folder)
+    if store_df is None:
+        return text_df if text_df is not None else compact_oneliners(_resolve_datetimes(parse_pages(input_folder, [])))
+    if text_df is None:
+        return store_df
+
+    text_only_df = text_df[~text_df["page"].isin(store_df["page"].unique())]
+    if len(text_only_df):
+        print(f"{text_only_df['page'].nunique()} page(s) not in {store_file} yet, read from the text pages "
+              f"(run pouet_reparse.py backfill to import them)")
+    df = pd.concat([store_df.astype({"nickname": object}), text_only_df.astype({"nickname": object})], ignore_index=True)
+    df = compact_oneliners(df.sort_values("page", kind="stable").reset_index(drop=True))
+    print(f"Oneliners: {len(df)} messages, {len(df) - len(text_only_df)} from the typed store")
+    return df
+
+
+def backfill_store(input_folder=ONELINER_FOLDER, store_file=ONELINER_STORE_FILE, cache_folder=CACHE_FOLDER, workers=None):
+    # Imports into the typed store the text pages it does not hold (pages fetched before the store
+    # existed, or with store_records = False). The text pages have no seconds: these records get ":00".
+    text_df = load_text_pages(input_folder, cache_folder, workers)
+    stored_pages = {record["page"] for record in iter_store_records(store_file)}
+    text_df = text_df[~text_df["page"].isin(stored_pages)]
+    records = [
+        {
+            "datetime": timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+            "user_id": int(pouet_id),
+            "nickname": nickname,
+            "message": message,
+            "page": int(page)
+        }
+        for timestamp, nickname, pouet_id, message, page in zip(
+            text_df["datetime"], text_df["nickname"].astype(object), text_df["pouet_id"], text_df["message"], text_df["page"]
+        )
+    ]
+    added = OnelinerStore(store_file).append(records)
+    print(f"Backfill: {added} oneliners from {text_df['page'].nunique()} text page(s) added to {store_file}")
+    return added
@@ -1,9 +1,15 @@
 import os
+import json
 import time
 import random
+import threading
 import requests
-from bs4 import BeautifulSoup
-import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pouet_http import HEADERS, TokenBucket, make_session, polite_get
+from pouet_html import extract_oneliners, format_oneliner_lines
+from pouet_page_archive import PageArchive
+from oneliner_store import OnelinerStore, page_oneliner_records
+from oneliner_corpus import date_regex, line_regex  # Stored page format, shared with the corpus loader
 
 # === CONFIGURATION ===
 output_dir = "pouet_oneliners"  # Folder where text files will be stored
@@ -11,103 +17,273 @@ base_delay = 15//2  # Base delay (in seconds)
 random_jitter = 30//2  # Maximum additional random seconds
 max_pages = 11635  # Total known number of pages to download
 
+# Concurrent mode: pooled keep-alive connections, shared politeness limit
+concurrent_mode = False
+workers = 4  # Parallel requests in flight
+requests_per_minute = 8  # Politeness limit shared by all the workers
+html_backend = None  # None = pouet_html.DEFAULT_BACKEND (html.parser unless POUET_HTML_BACKEND is set)
+archive_pages = True  # Keep the raw HTML (see pouet_page_archive.py), to re-parse without re-fetching
+store_records = True  # Also append typed records to the oneliner store (see oneliner_store.py)
+
+# Sync mode: only fetch the messages posted since the newest stored one
+sync_mode = False
+sync_state_file = os.path.join(output_dir, "_sync_state.json")
+
 # Friendly browser signature
-headers = {
-    "User-Agent": (
-        "AstrofraResearchBot/1.0 (+https://www.pouet.net/user.php?who=38632 ; contact: astrofra@gmail.com)"
-    )
-}
+headers = HEADERS
 
-# Create output folder if it does not exist
-os.makedirs(output_dir, exist_ok=True)
 
-# Check for already downloaded pages to resume automatically
-existing_files = sorted([
-    int(f.split(".")[0]) for f in os.listdir(output_dir) if f.endswith(".txt") and f.split(".")[0].isdigit()
-])
+def save_page(page_num, records, store=None):
+    # Save the extracted lines to a text file, and the typed records to the store
+    output_path = os.path.join(output_dir, f"{page_num:05d}.txt")
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(format_oneliner_lines(records)))
+    if store is not None:
+        store.append(page_oneliner_records(records, page_num))
 
-# Determine the starting page
-start_page = existing_files[-1] + 1 if existing_files else 1
 
-# initialize a start time:
-script_start_time = time.time()
+def print_eta(start_time, pages_done, pages_remaining):
+    # Calculate elapsed time and estimate remaining time
+    elapsed_time = time.time() - start_time
+    if pages_done > 0:
+        avg_time_per_page = elapsed_time / pages_done
+        est_remaining_seconds = avg_time_per_page * pages_remaining
+        est_days = int(est_remaining_seconds // 86400)
+        est_hours = int((est_remaining_seconds % 86400) // 3600)
 
-# Main loop to download pages
-for page_num in range(start_page, max_pages + 1):
-    url = f"https://www.pouet.net/oneliner.php?page={page_num}"
-    print(f"Downloading page {page_num}...")
+        print(f"Estimated remaining time: {est_days} days {est_hours} hours.")
 
-    try:
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            print(f"Error {response.status_code} while fetching page {page_num}. Stopping.")
+
+def download_sequential(pages):
+    # One page at a time, with a randomized delay to mimic human browsing behavior
+    archive = PageArchive() if archive_pages else None
+    store = OnelinerStore() if store_records else None
+    script_start_time = time.time()
+
+    for pages_done, page_num in enumerate(pages, start=1):
+        url = f"https://www.pouet.net/oneliner.php?page={page_num}"
+        print(f"Downloading page {page_num}...")
+
+        try:
+            response = requests.get(url, headers=headers)
+            if response.status_code != 200:
+                print(f"Error {response.status_code} while fetching page {page_num}. Stopping.")
+                break
+
+            if archive:
+                archive.add("oneliner", page_num, response.text)
+            records = extract_oneliners(response.text, html_backend)
+            if records is None:
+                print(f"Boxlist not found on page {page_num}.")
+                continue
+
+            save_page(page_num, records, store)
+
+            # Randomized delay to mimic human browsing behavior
+            jitter = random.uniform(0, random_jitter)
+            for i in range(1, 3):
+                jitter *= random.uniform(0.5, 1.0)
+            actual_delay = max(1, base_delay + jitter)  # Prevent negative or too short delays
+
+            print_eta(script_start_time, pages_done, len(pages) - pages_done)
+
+            print(f"Page {page_num} saved. Sleeping {actual_delay}s.")
+            time.sleep(actual_delay)
+
+        except KeyboardInterrupt:
+            print("Manual interruption detected. Stopping.")
+            break
+        except Exception as e:
+            print(f"Error while processing page {page_num}: {e}")
             break
 
-        soup = BeautifulSoup(response.text, "html.parser")
-        
-        output_lines = []  # List to store extracted lines
-        
-        # Locate the UL element containing oneliner entries
-        boxlist = soup.find("ul", class_="boxlist")
-        if not boxlist:
-            print(f"Boxlist not found on page {page_num}.")
-            continue
-        
-        for li in boxlist.find_all("li"):
-            if "day" in li.get("class", []):
-                # Date header
-                output_lines.append(li.get_text(strip=True))
-            else:
-                # Classic oneliner entry
-                time_tag = li.find("time")
-                user_tag = li.find("a", class_="usera")
-                
-                if not time_tag or not user_tag:
-                    continue  # Skip malformed lines
-                
-                # <li><time datetime='2000-10-04 18:30:26' title='2000-10-04 18:30:26'>18:30</time> <a href='user.php?who=1' class='usera' title="analogue">
-                time_text = time_tag.get_text(strip=True)
-                nickname = user_tag.get("title", "unknown")
-                pouet_id = user_tag.get("href", "unknown").split('=')[1]
-                
-                # Extract oneliner text by removing time and avatar image
-                text_parts = li.get_text(separator=" ", strip=True).split(' ', 1)
-                message_text = text_parts[1] if len(text_parts) > 1 else ""
-
-                output_lines.append(f"{time_text} {nickname}[{pouet_id}] : {message_text}")
-
-        # Save the extracted lines to a text file
-        output_path = os.path.join(output_dir, f"{page_num:05d}.txt")
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write("\n".join(output_lines))
-
-        # Randomized delay to mimic human browsing behavior
-        jitter = random.uniform(0, random_jitter)
-        for i in range(1, 3):
-            jitter *= random.uniform(0.5, 1.0)
-        actual_delay = max(1, base_delay + jitter)  # Prevent negative or too short delays
-
-        # Calculate elapsed time and estimate remaining time
-        elapsed_time = time.time() - script_start_time
-        pages_done = page_num - start_page + 1
-        pages_remaining = max_pages - page_num
-
-        if pages_done > 0:
-            avg_time_per_page = elapsed_time / pages_done
-            est_remaining_seconds = avg_time_per_page * pages_remaining
-            est_days = int(est_remaining_seconds // 86400)
-            est_hours = int((est_remaining_seconds % 86400) // 3600)
-            
-            print(f"Estimated remaining time: {est_days} days {est_hours} hours.")
-
-        print(f"Page {page_num} saved. Sleeping {actual_delay}s.")
-        time.sleep(actual_delay)
 
+def download_concurrent(pages):
+    # Several workers share one keep-alive session and one token bucket,
+    # so the overall request rate never exceeds `requests_per_minute`.
+    session = make_session(pool_size=workers)
+    bucket = TokenBucket(rate=requests_per_minute / 60, capacity=1)
+    archive = PageArchive() if archive_pages else None
+    store = OnelinerStore() if store_records else None
+    script_start_time = time.time()
+    stop = threading.Event()  # Set on Ctrl-C: the workers send no other request or retry
+
+    def fetch_page(page_num):
+        url = f"https://www.pouet.net/oneliner.php?page={page_num}"
+        response = polite_get(session, url, bucket, stop=stop)
+        if stop.is_set() and (response is None or response.status_code != 200):
+            return page_num, "Interrupted"
+        if response is None or response.status_code != 200:
+            status = response.status_code if response is not None else "no response"
+            return page_num, f"Error {status}"
+
+        if archive:
+            archive.add("oneliner", page_num, response.text)
+        records = extract_oneliners(response.text, html_backend)
+        if records is None:
+            return page_num, "Boxlist not found"
+
+        save_page(page_num, records, store)
+        return page_num, None
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(fetch_page, page_num) for page_num in pages]
+        for pages_done, future in enumerate(as_completed(futures), start=1):
+            try:
+                page_num, error = future.result()
+            except Exception as e:
+                print(f"Error while processing a page: {e}")
+                continue
+            if error:
+                # Missing pages are picked up again on the next run
+                print(f"{error} on page {page_num}, skipped.")
+            else:
+                print(f"Page {page_num} saved.")
+            if pages_done % 10 == 0:
+                print_eta(script_start_time, pages_done, len(pages) - pages_done)
     except KeyboardInterrupt:
-        print("Manual interruption detected. Stopping.")
-        break
-    except Exception as e:
-        print(f"Error while processing page {page_num}: {e}")
-        break
+        stop.set()
+        print("Manual interruption detected. Stopping after the requests in progress (Ctrl-C again to quit now).")
+    finally:
+        # Pending pages are dropped (missing pages are picked up again on the next run). The workers
+        # are non-daemon threads: they are waited for, but stop before their next request or back-off.
+        try:
+            executor.shutdown(wait=True, cancel_futures=True)
+        except KeyboardInterrupt:
+            print("Second interruption, quitting now.")
+            os._exit(1)
+        session.close()
+
+
+def oneliner_key(datetime_str, user_id, message):
+    # (datetime, user id, text) identifies a message; the stored pages have no seconds,
+    # so the datetime is compared to the minute
+    return datetime_str[:16], str(user_id), message
+
+
+def page_record_keys(records):
+    # Keys of the messages of a fetched page, in page order
+    keys = []
+    current_date = None
+    for record in records:
+        if "day" in record:
+            current_date = record["day"]
+        elif record.get("datetime"):
+            keys.append(oneliner_key(record["datetime"], record["user_id"], record["message"]))
+        elif current_date:
+            keys.append(oneliner_key(f"{current_date} {record['time']}", record["user_id"], record["message"]))
+    return keys
+
+
+def stored_page_keys(page_num):
+    # Keys of the messages of a page saved in output_dir
+    keys = []
+    path = os.path.join(output_dir, f"{page_num:05d}.txt")
+    if not os.path.exists(path):
+        return keys
+    with open(path, "r", encoding="utf-8") as f:
+        current_date = None
+        for line in f:
+            line = line.strip()
+            if date_regex.match(line):
+                current_date = line
+            else:
+                match = line_regex.match(line)
+                if match and current_date:
+                    time_text, _, pouet_id, message = match.groups()
+                    keys.append(oneliner_key(f"{current_date} {time_text}", pouet_id, message))
+    return keys
+
+
+def load_sync_state(existing_files):
+    if os.path.exists(sync_state_file):
+        with open(sync_state_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    # First sync: start from the highest page of the crawl
+    last_page = existing_files[-1] if existing_files else 1
+    keys = stored_page_keys(last_page)
+    return {"last_page": last_page, "newest": list(max(keys)) if keys else None}
+
+
+def save_sync_state(state):
+    with open(sync_state_file, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, ensure_ascii=False)
+
+
+def sync_new_oneliners(existing_files):
+    # Pages are numbered from the oldest messages: new messages first fill the last stored
+    # page, then the following ones. Starting from the last stored page, fetch pages until
+    # one brings nothing new. Messages already stored (same datetime, user id and text) are
+    # skipped, so a page boundary that moved between two runs doesn't create duplicates.
+    # Returns the new messages keys.
+    state = load_sync_state(existing_files)
+    newest = tuple(state["newest"]) if state["newest"] else None
+    known_keys = set(stored_page_keys(state["last_page"]))
+    session = make_session(pool_size=1)
+    bucket = TokenBucket(rate=requests_per_minute / 60, capacity=1)
+    archive = PageArchive() if archive_pages else None
+    store = OnelinerStore() if store_records else None
+    new_keys = []
+
+    page_num = state["last_page"]
+    while True:
+        url = f"https://www.pouet.net/oneliner.php?page={page_num}"
+        print(f"Syncing page {page_num}...")
+        response = polite_get(session, url, bucket)
+        if response is None or response.status_code != 200:
+            status = response.status_code if response is not None else "no response"
+            print(f"Error {status} while fetching page {page_num}. Stopping.")
+            break
+
+        if archive:
+            archive.add("oneliner", page_num, response.text)
+        records = extract_oneliners(response.text, html_backend)
+        if not records:
+            break
+
+        page_new_keys = [
+            key for key in page_record_keys(records)
+            if key not in known_keys and (newest is None or key[0] >= newest[0])
+        ]
+        if not page_new_keys and page_num > state["last_page"]:
+            # Past the end (pouet.net serves the last page again), nothing new
+            break
+
+        save_page(page_num, records, store)
+        known_keys.update(page_new_keys)
+        new_keys += page_new_keys
+        if page_new_keys:
+            state["last_page"] = page_num
+        page_num += 1
+
+    session.close()
+    if new_keys:
+        state["newest"] = list(max(new_keys))
+    save_sync_state(state)
+    print(f"{len(new_keys)} new oneliners, last page is now {state['last_page']}.")
+    return new_keys
+
+
+if __name__ == "__main__":
+    # Create output folder if it does not exist
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Check for already downloaded pages to resume automatically
+    existing_files = sorted([
+        int(f.split(".")[0]) for f in os.listdir(output_dir) if f.endswith(".txt") and f.split(".")[0].isdigit()
+    ])
+
+    if sync_mode:
+        sync_new_oneliners(existing_files)
+    elif concurrent_mode:
+        # Pages are not completed in order, fill every gap
+        existing_pages = set(existing_files)
+        pages = [page_num for page_num in range(1, max_pages + 1) if page_num not in existing_pages]
+        download_concurrent(pages)
+    else:
+        # Determine the starting page
+        start_page = existing_files[-1] + 1 if existing_files else 1
+        download_sequential(list(range(start_page, max_pages + 1)))
 
-print("Script completed or stopped.")
+    print("Script completed or stopped.")
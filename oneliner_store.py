@@ -0,0 +1,102 @@
+import os
+import json
+import hashlib
+import threading
+
+# Typed oneliner records, one JSON object per line, append-only:
+# {"datetime": "YYYY-MM-DD HH:MM:SS", "user_id": 1, "nickname": "...", "message": "...", "page": 1}
+ONELINER_STORE_FILE = "pouet_oneliners.jsonl"
+
+
+def record_digest(datetime_str, user_id, message):
+    # Compact dedup key, so the whole store's keys fit in memory
+    payload = f"{datetime_str}\x00{user_id}\x00{message}".encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=8).digest()
+
+
+def page_oneliner_records(records, page_num):
+    # Turns the records of pouet_html.extract_oneliners into typed store records.
+    # The <time datetime=...> attribute carries the seconds that the text pages drop.
+    typed_records = []
+    current_date = None
+    for record in records:
+        if "day" in record:
+            current_date = record["day"]
+            continue
+        datetime_str = record.get("datetime")
+        if not datetime_str:
+            if not current_date:
+                continue
+            datetime_str = f"{current_date} {record['time']}:00"
+        try:
+            user_id = int(record["user_id"])
+        except ValueError:
+            continue
+        typed_records.append({
+            "datetime": datetime_str,
+            "user_id": user_id,
+            "nickname": record["nickname"],
+            "message": record["message"],
+            "page": page_num
+        })
+    return typed_records
+
+
+def iter_store_records(store_file=ONELINER_STORE_FILE):
+    if not os.path.exists(store_file):
+        return
+    with open(store_file, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Torn last line after a crash
+
+
+class OnelinerStore:
+    # Append-only store, safe to share between download threads.
+    # A message already stored (same datetime, user id and text) is never appended twice,
+    # so pages can be fetched again (resume, sync) without creating duplicates.
+    def __init__(self, store_file=ONELINER_STORE_FILE):
+        self.store_file = store_file
+        self.lock = threading.Lock()
+        self.digests = {
+            record_digest(record["datetime"], record["user_id"], record["message"])
+            for record in iter_store_records(store_file)
+        }
+        self._truncate_torn_line()
+
+    def _truncate_torn_line(self):
+        # A crash while appending can leave a partial last line (skipped by iter_store_records):
+        # it is cut off, otherwise the next record would be written on the same line and lost
+        if not os.path.exists(self.store_file):
+            return
+        with open(self.store_file, "rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                block_start = max(0, position - 65536)
+                f.seek(block_start)
+                block = f.read(position - block_start)
+                newline = block.rfind(b"\n")
+                if newline != -1:
+                    position = block_start + newline + 1
+                    break
+                position = block_start
+            if position < end:
+                print(f"{self.store_file}: truncating a partial last record ({end - position} bytes)")
+                f.truncate(position)
+
+    def append(self, typed_records):
+        with self.lock:
+            new_records = []
+            for record in typed_records:
+                digest = record_digest(record["datetime"], record["user_id"], record["message"])
+                if digest not in self.digests:
+                    self.digests.add(digest)
+                    new_records.append(record)
+            if new_records:
+                with open(self.store_file, "a", encoding="utf-8") as f:
+                    for record in new_records:
+                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return len(new_records)
@@ -1,6 +1,6 @@
 import os
-import re
 import pandas as pd
+from oneliner_corpus import load_oneliners
 import matplotlib.pyplot as plt
 from datetime import datetime
 from rapidfuzz import fuzz
@@ -12,37 +12,12 @@ def fuzzy_occurence(target_phrases, output_png):
     output_folder = "./stats"
     os.makedirs(output_folder, exist_ok=True)
 
-    # Regex for valid oneliner lines
-    line_regex = re.compile(r"^(\d{2}:\d{2})\s+(.*?)\[(\d+)\]\s+:\s+(.*)$")
-
     # List of phrases to track
     # # target_phrases = ["the scene is dead", "the scene died", "la scene est morte"]
 
-    # Data storage
-    data = []
-
-    # Read all .txt files
-    for filename in sorted(os.listdir(input_folder)):
-        if filename.endswith(".txt"):
-            with open(os.path.join(input_folder, filename), "r", encoding="utf-8") as f:
-                current_date = None
-                for line in f:
-                    line = line.strip()
-                    if re.match(r"^\d{4}-\d{2}-\d{2}$", line):
-                        current_date = line
-                    else:
-                        match = line_regex.match(line)
-                        if match and current_date:
-                            time_text, nickname, pouet_id, message = match.groups()
-                            datetime_str = f"{current_date} {time_text}"
-                            data.append({
-                                "datetime": datetime_str,
-                                "message": message.lower()
-                            })
-
-    # Convert to DataFrame
-    df = pd.DataFrame(data)
-    df["datetime"] = pd.to_datetime(df["datetime"], format="%Y-%m-%d %H:%M")
+    # Load all oneliners (parsed once, then cached)
+    df = load_oneliners(input_folder)[["datetime", "message"]]
+    df["message"] = df["message"].str.lower()
     df = df.sort_values("datetime")
     df["quarter"] = df["datetime"].dt.to_period("Q")
     df["month"] = df["datetime"].dt.to_period("M")
@@ -86,6 +61,7 @@ def fuzzy_occurence(target_phrases, output_png):
 
     print(f"Monthly and quarterly overlay curve saved to {output_folder}")
 
-fuzzy_occurence(meme_array_scene_is_dead, 
-                "occurence_scene_is_dead_monthly_quarterly.png")
-# fuzzy_occurence(["works on my machine", "works on my pc", "works on my computer", "works on my amiga"], "occurence_works_on_my_machine_quarterly.png")
\ No newline at end of file
+if __name__ == "__main__":
+    fuzzy_occurence(meme_array_scene_is_dead, 
+                    "occurence_scene_is_dead_monthly_quarterly.png")
+    # fuzzy_occurence(["works on my machine", "works on my pc", "works on my computer", "works on my amiga"], "occurence_works_on_my_machine_quarterly.png")
\ No newline at end of file
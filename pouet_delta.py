@@ -0,0 +1,123 @@
+import os
+import json
+import hashlib
+from datetime import datetime
+
+# State of the previous export: {prod_id: {"hash": ..., "platforms": [...]}}
+PRODS_STATE_FILE = "db/_prods_state.json"
+# Append-only feed of the changes between two exports (JSON Lines)
+CHANGES_FEED_FILE = "db/changes.jsonl"
+
+
+def prod_hash(prod):
+    # Stable content hash, independent from the keys order in the dump
+    payload = json.dumps(prod, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def load_prods_state(state_file=PRODS_STATE_FILE):
+    if not os.path.exists(state_file):
+        return {}
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Cannot read previous export state, doing a full export : {e}")
+        return {}
+
+
+def save_prods_state(state, state_file=PRODS_STATE_FILE):
+    os.makedirs(os.path.dirname(state_file), exist_ok=True)
+    tmp_file = state_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, separators=(',', ':'))
+    os.replace(tmp_file, state_file)
+
+
+def build_prods_state(platform_dict):
+    # Hashes every exported prod once, even if it is listed on several platforms
+    state = {}
+    prods_by_id = {}
+    for platform, prods in platform_dict.items():
+        for prod in prods:
+            prod_id = str(prod.get('id'))
+            if prod_id not in state:
+                state[prod_id] = {"hash": prod_hash(prod), "platforms": []}
+                prods_by_id[prod_id] = prod
+            state[prod_id]["platforms"].append(platform)
+    return state, prods_by_id
+
+
+def compute_prods_delta(previous_state, new_state):
+    added = [prod_id for prod_id in new_state if prod_id not in previous_state]
+    removed = [prod_id for prod_id in previous_state if prod_id not in new_state]
+    changed = [
+        prod_id for prod_id in new_state
+        if prod_id in previous_state and (
+            previous_state[prod_id]["hash"] != new_state[prod_id]["hash"]
+            or sorted(previous_state[prod_id]["platforms"]) != sorted(new_state[prod_id]["platforms"])
+        )
+    ]
+
+    # A platform file must be rewritten if it gains, loses or holds a modified prod
+    dirty_platforms = set()
+    for prod_id in added:
+        dirty_platforms.update(new_state[prod_id]["platforms"])
+    for prod_id in removed:
+        dirty_platforms.update(previous_state[prod_id]["platforms"])
+    for prod_id in changed:
+        dirty_platforms.update(previous_state[prod_id]["platforms"])
+        dirty_platforms.update(new_state[prod_id]["platforms"])
+
+    return {
+        "added": added,
+        "changed": changed,
+        "removed": removed,
+        "dirty_platforms": dirty_platforms
+    }
+
+
+def defer_failed_platforms(delta, previous_state, new_state, failed_platforms):
+    # Removes from the delta and the new state the changes that touch a platform file which
+    # could not be written: these prods keep their previous state (or stay unknown if new),
+    # so they are seen, exported and reported again by the next run.
+    deferred = set()
+    for prod_id in delta["added"] + delta["changed"]:
+        if failed_platforms.intersection(new_state[prod_id]["platforms"]):
+            deferred.add(prod_id)
+    for prod_id in delta["removed"] + delta["changed"]:
+        if failed_platforms.intersection(previous_state[prod_id]["platforms"]):
+            deferred.add(prod_id)
+
+    state = dict(new_state)
+    for prod_id in deferred:
+        if prod_id in previous_state:
+            state[prod_id] = previous_state[prod_id]
+        else:
+            state.pop(prod_id, None)
+    delta = {
+        "added": [prod_id for prod_id in delta["added"] if prod_id not in deferred],
+        "changed": [prod_id for prod_id in delta["changed"] if prod_id not in deferred],
+        "removed": [prod_id for prod_id in delta["removed"] if prod_id not in deferred],
+        "dirty_platforms": delta["dirty_platforms"]
+    }
+    return delta, state
+
+
+def append_changes_feed(delta, new_state, prods_by_id, dump_name, feed_file=CHANGES_FEED_FILE):
+    # One JSON line per changed prod, so consumers can tail the feed from their last offset
+    os.makedirs(os.path.dirname(feed_file), exist_ok=True)
+    exported_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with open(feed_file, 'a', encoding='utf-8') as f:
+        for op in ("added", "changed", "removed"):
+            for prod_id in delta[op]:
+                record = {"dump": dump_name, "exported_at": exported_at, "op": op, "id": prod_id}
+                if op != "removed":
+                    record["platforms"] = new_state[prod_id]["platforms"]
+                    record["prod"] = prods_by_id[prod_id]
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def print_delta_report(delta):
+    print(f"Delta : {len(delta['added'])} added, {len(delta['changed'])} changed, {len(delta['removed'])} removed prods.")
+    print(f"{len(delta['dirty_platforms'])} platform file(s) to rewrite.")
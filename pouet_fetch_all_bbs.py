@@ -4,7 +4,8 @@ import time
 import json
 import random
 import requests
-from bs4 import BeautifulSoup
+from pouet_html import parse_bbs_page
+from pouet_page_archive import PageArchive
 from datetime import datetime, timedelta
 
 # Constants
@@ -13,6 +14,7 @@ LOG_FILE = os.path.join(OUTPUT_FOLDER, "bbs_index.log")
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
 BASE_URL = "https://www.pouet.net/topic.php?which={}&page={}"
+HTML_BACKEND = None  # None = pouet_html.DEFAULT_BACKEND (html.parser unless POUET_HTML_BACKEND is set)
 
 HEADERS = {
     "User-Agent": (
@@ -38,44 +40,6 @@ def log_scraped_topic(topic_id, filename_base):
         f.write(f"{topic_id};{filename_base}\n")
 
 
-def get_total_pages(soup):
-    select = soup.find("select", {"name": "page"})
-    if select:
-        return max([int(o.text) for o in select.find_all("option")])
-    return 1
-
-
-def get_topic_title(soup):
-    h2 = soup.select_one("#pouetbox_bbsview h2")
-    return h2.text.strip() if h2 else "untitled"
-
-
-def extract_posts(soup):
-    posts = []
-    for post_div in soup.find_all("div", class_="bbspost"):
-        content_tag = post_div.find("div", class_="content")
-        foot_tag = post_div.find("div", class_="foot")
-        if not content_tag or not foot_tag:
-            continue
-
-        content = content_tag.get_text(separator="\n").strip()
-        date_match = re.search(r"added on the\s+(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})", foot_tag.text)
-        date_str = date_match.group(1) if date_match else "unknown"
-
-        user_link = foot_tag.find("a", href=re.compile(r"user\.php\?who=\d+"))
-        nickname = user_link.text.strip() if user_link else "unknown"
-        user_id_match = re.search(r"who=(\d+)", user_link["href"]) if user_link else None
-        user_id = user_id_match.group(1) if user_id_match else "?"
-
-        posts.append({
-            "timestamp": date_str,
-            "user_nick": nickname,
-            "user_id": user_id,
-            "content": content
-        })
-    return posts
-
-
 def save_topic_files(topic_id, creation_date, title, posts):
     date_str = creation_date.strftime("%Y-%m-%d")
     filename_base = f"{topic_id:05d}_{date_str}_{sanitize_filename(title)}"
@@ -99,23 +63,35 @@ def save_topic_files(topic_id, creation_date, title, posts):
     return filename_base
 
 
-def scrape_topic(topic_id):
+def remove_stale_topic_files(topic_id, filename_base):
+    # The title or the creation date of a topic may have changed since its files were written:
+    # the other .txt/.json files of the topic are removed, so it is only loaded once
+    prefix = f"{topic_id:05d}_"
+    with os.scandir(OUTPUT_FOLDER) as it:
+        for entry in it:
+            name, extension = os.path.splitext(entry.name)
+            if name.startswith(prefix) and extension in (".txt", ".json") and name != filename_base:
+                os.remove(entry.path)
+
+
+def scrape_topic(topic_id, archive=None):
     try:
         r = requests.get(BASE_URL.format(topic_id, 1), headers=HEADERS, timeout=10)
         if r.status_code != 200:
             return None, f"Skipped (HTTP {r.status_code})"
 
-        soup = BeautifulSoup(r.text, "html.parser")
-        total_pages = get_total_pages(soup)
-        title = get_topic_title(soup)
-        all_posts = extract_posts(soup)
+        if archive:
+            archive.add("bbs", f"{topic_id}:1", r.text)
+        title, total_pages, all_posts = parse_bbs_page(r.text, HTML_BACKEND)
 
         for page in range(2, total_pages + 1):
             print('.', end='')
             time.sleep(random.uniform(10, 30))
             r_page = requests.get(BASE_URL.format(topic_id, page), headers=HEADERS, timeout=10)
-            soup_page = BeautifulSoup(r_page.text, "html.parser")
-            all_posts += extract_posts(soup_page)
+            if archive:
+                archive.add("bbs", f"{topic_id}:{page}", r_page.text)
+            _, _, page_posts = parse_bbs_page(r_page.text, HTML_BACKEND)
+            all_posts += page_posts
 
         if not all_posts:
             return None, "No posts found"
@@ -141,10 +117,11 @@ def main(start_id=1, end_id=12872):
     to_do = [i for i in range(start_id, end_id + 1) if i not in scraped]
     total = len(to_do)
     start_time = time.time()
+    archive = PageArchive()
 
     for idx, topic_id in enumerate(to_do, start=1):
         topic_start = time.time()
-        filename, error = scrape_topic(topic_id)
+        filename, error = scrape_topic(topic_id, archive)
 
         elapsed = time.time() - start_time
         avg_time = elapsed / idx
@@ -0,0 +1,2 @@
+python pouet_fetch_all_dumps.py
+pause
\ No newline at end of file
@@ -0,0 +1,106 @@
+import os
+import gzip
+import json
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from main import fetch_latest_dumps, download_dump, iter_dump_items
+from pouet_prods_sqlite import prod_placings
+
+POUET_INDEX_FILE = "db/pouet_index.json.gz"
+
+
+def _index_names(filename, key):
+    # groups / parties / boards dumps: keep an id -> name table
+    return {str(item.get('id')): item.get('name') for item in iter_dump_items(filename, key)}
+
+
+def _index_prods(filename):
+    # Cross-reference indexes built from the prods dump, in a single pass
+    prods = {}
+    platforms = {}
+    platform_prods = defaultdict(list)
+    group_prods = defaultdict(list)
+    party_prods = defaultdict(list)
+    user_prods = defaultdict(list)
+    for prod in iter_dump_items(filename, 'prods'):
+        prod_id = str(prod.get('id'))
+        prods[prod_id] = [prod.get('name'), prod.get('type'), prod.get('releaseDate')]
+        for platform_id, platform in (prod.get('platforms') or {}).items():
+            platforms[str(platform_id)] = platform.get('name')
+            platform_prods[str(platform_id)].append(prod_id)
+        for group in prod.get('groups') or []:
+            group_prods[str(group.get('id'))].append(prod_id)
+        for party, _ in prod_placings(prod):
+            party_prods[str(party.get('id'))].append(prod_id)
+        for credit in prod.get('credits') or []:
+            user_id = (credit.get('user') or {}).get('id')
+            if user_id is not None:
+                user_prods[str(user_id)].append(prod_id)
+    return {
+        "prods": prods,
+        "platforms": platforms,
+        "platform_prods": platform_prods,
+        "group_prods": group_prods,
+        "party_prods": party_prods,
+        "user_prods": user_prods
+    }
+
+
+def parse_dump(dump_type, filename):
+    if dump_type == 'prods':
+        return dump_type, _index_prods(filename)
+    return dump_type, {dump_type: _index_names(filename, dump_type)}
+
+
+def fetch_all_dumps(workers=4):
+    # Downloads every dump type of the newest date at once (each download is skipped or
+    # resumed by download_dump), each dump being parsed in its own process as soon as
+    # its download is over.
+    latest_dumps = fetch_latest_dumps()
+    if not latest_dumps:
+        return None
+
+    dump_types = [dump_type for dump_type, info in latest_dumps.items() if isinstance(info, dict) and 'url' in info]
+    print(f"Fetching dumps: {', '.join(dump_types)}")
+
+    index = {"dumps": {}}
+    with ProcessPoolExecutor(max_workers=workers) as parsers:
+        def download_and_parse(dump_type):
+            filename = download_dump(latest_dumps[dump_type])
+            if not filename:
+                return None
+            index["dumps"][dump_type] = os.path.basename(filename)
+            return parsers.submit(parse_dump, dump_type, filename)
+
+        with ThreadPoolExecutor(max_workers=workers) as downloaders:
+            parse_futures = [future for future in downloaders.map(download_and_parse, dump_types) if future]
+
+        for future in parse_futures:
+            try:
+                dump_type, partial_index = future.result()
+            except Exception as e:
+                print(f"Error while parsing a dump: {e}")
+                continue
+            print(f"Parsed : {dump_type}")
+            index.update(partial_index)
+    return index
+
+
+def save_pouet_index(index, index_file=POUET_INDEX_FILE):
+    os.makedirs(os.path.dirname(index_file), exist_ok=True)
+    tmp_file = index_file + '.tmp'
+    with gzip.open(tmp_file, 'wt', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_file, index_file)
+    print(f"Exported : {index_file}")
+
+
+def load_pouet_index(index_file=POUET_INDEX_FILE):
+    with gzip.open(index_file, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    index = fetch_all_dumps()
+    if index:
+        save_pouet_index(index)
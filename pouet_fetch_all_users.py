@@ -1,51 +1,55 @@
-import random
-import time
-import json
-import os
-from pouet_user import fetch_user_nickname_from_id
+from itertools import islice
+from pouet_user import open_user_store, fetch_users, set_api_rate
+from pouet_user_crawl import FOUND, NOT_FOUND, UserCrawlState, seed_crawl_state, local_user_activity
 
 # Constants
 max_user_id = 108641
 user_cache_folder = "./pouet_users"
-not_found_file = "not_found_users.json"
-
-os.makedirs(user_cache_folder, exist_ok=True)
-
-# Load not-found cache
-if os.path.exists(not_found_file):
-    with open(not_found_file, "r", encoding="utf-8") as f:
-        not_found_users = set(json.load(f))
-else:
-    not_found_users = set()
-
-def save_not_found_cache():
-    with open(not_found_file, "w", encoding="utf-8") as f:
-        json.dump(sorted(not_found_users), f, indent=2)
-
-# Main loop
-try:
-    while True:
-        time.sleep(random.uniform(30, 120))  # between 30 seconds and 2 minutes
-
-        next_user_id = random.randint(0, max_user_id)
-
-        # Skip if already cached or known not to exist
-        json_path = os.path.join(user_cache_folder, f"{next_user_id}.json")
-        if os.path.exists(json_path) or next_user_id in not_found_users:
-            continue
-
-        user_found = fetch_user_nickname_from_id(user_cache_folder, next_user_id)
-
-        if not user_found.isdigit():  # user exists
-            print(f"✔ ID {next_user_id} exists (nickname: {user_found})")
-            delay = 5 + random.uniform(0, 10)
-            print(f"Waiting {delay:.1f}s before next API call...")
-            time.sleep(delay)
-        else:
-            print(f"✘ ID {next_user_id} not found")
-            not_found_users.add(next_user_id)
-            save_not_found_cache()
-
-except KeyboardInterrupt:
-    print("\nInterrupted by user, saving state...")
-    save_not_found_cache()
\ No newline at end of file
+not_found_file = "not_found_users.json"  # Legacy not-found list, imported on the first run
+batch_size = 8  # Ids fetched concurrently, paced by the shared API rate limiter of pouet_user
+# One API call every ~90 s on average, the pace of the former crawler (30-120 s wait + 10-15 s after
+# each call). This is a background crawl of the whole id space: keep it gentle on api.pouet.net.
+requests_per_minute = 60 / 90
+
+if __name__ == "__main__":
+    set_api_rate(requests_per_minute)
+
+    store = open_user_store(legacy_folder=user_cache_folder)
+    # Users seen in the oneliners, BBS posts and prod credits certainly exist: they are crawled first
+    activity = local_user_activity()
+    crawl_state = UserCrawlState(max(max_user_id, max(activity, default=0)))
+    if crawl_state.is_new:
+        print(f"Crawl state initialized with {seed_crawl_state(crawl_state, store, not_found_file)} known ids")
+    print(f"Crawl state: {crawl_state.counts()}")
+
+    # Main loop: known ids by activity, then the other pending ids, drawn from a shuffled permutation
+    # without replacement
+    next_user_ids = []
+    try:
+        pending_ids = crawl_state.frontier_ids(activity)
+        while True:
+            next_user_ids = list(islice(pending_ids, batch_size))
+            if not next_user_ids:
+                break
+
+            for user_id, user in fetch_users(next_user_ids, user_cache_folder).items():
+                if user is None:
+                    print(f"? ID {user_id} could not be fetched, will retry on the next run")
+                elif not user[1]:  # user exists
+                    print(f"✔ ID {user_id} exists (nickname: {user[0]})")
+                    crawl_state.mark(user_id, FOUND)
+                else:
+                    print(f"✘ ID {user_id} not found")
+                    crawl_state.mark(user_id, NOT_FOUND)
+        print(f"All ids up to {max_user_id} crawled: {crawl_state.counts()}")
+
+    except KeyboardInterrupt:
+        print("\nInterrupted by user, saving state...")
+        # The users of the interrupted batch fetched before the interruption are already in the store
+        for user_id in next_user_ids:
+            user = store.get(user_id)
+            if user is not None:
+                crawl_state.mark(user_id, NOT_FOUND if user[1] else FOUND)
+
+    finally:
+        crawl_state.close()
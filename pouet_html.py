@@ -0,0 +1,200 @@
+import os
+import re
+from bs4 import BeautifulSoup
+
+try:
+    from selectolax.parser import HTMLParser  # Optional: fast CSS-selector engine (lexbor/modest)
+except ImportError:
+    HTMLParser = None
+
+try:
+    import lxml  # Optional: C parser for BeautifulSoup
+except ImportError:
+    lxml = None
+
+# Available backends, fastest first:
+# - "selectolax": CSS selectors on a C HTML parser
+# - "lxml": BeautifulSoup on top of the lxml parser
+# - "html.parser": BeautifulSoup with the pure-Python parser (historical behavior)
+# html.parser stays the default, so the parsed output does not depend on the installed packages.
+# A fast backend is opt-in (POUET_HTML_BACKEND environment variable, or the scripts' backend
+# setting), once pouet_html_benchmark.py reports the same records as html.parser on real pages.
+BACKENDS = [
+    backend for backend, available in (
+        ("selectolax", HTMLParser is not None),
+        ("lxml", lxml is not None),
+        ("html.parser", True)
+    ) if available
+]
+DEFAULT_BACKEND = os.environ.get("POUET_HTML_BACKEND") or "html.parser"
+
+BBS_DATE_REGEX = re.compile(r"added on the\s+(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})")
+BBS_USER_HREF_REGEX = re.compile(r"user\.php\?who=\d+")
+BBS_USER_ID_REGEX = re.compile(r"who=(\d+)")
+
+
+def _resolve_backend(backend):
+    backend = backend or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"HTML backend '{backend}' is not available (available: {', '.join(BACKENDS)})")
+    return backend
+
+
+# ----------- oneliner pages -----------
+
+def _oneliner_entry(time_text, datetime_attr, nickname, href, li_text):
+    # Same rules as the historical downloader: the first word of the <li> text is the time,
+    # the rest is the message
+    text_parts = li_text.split(' ', 1)
+    return {
+        "time": time_text,
+        "datetime": datetime_attr,
+        "nickname": nickname,
+        "user_id": href.split('=')[1],
+        "message": text_parts[1] if len(text_parts) > 1 else ""
+    }
+
+
+def _extract_oneliners_bs4(html, parser):
+    soup = BeautifulSoup(html, parser)
+    boxlist = soup.find("ul", class_="boxlist")
+    if not boxlist:
+        return None
+
+    records = []
+    for li in boxlist.find_all("li"):
+        if "day" in li.get("class", []):
+            records.append({"day": li.get_text(strip=True)})
+            continue
+        time_tag = li.find("time")
+        user_tag = li.find("a", class_="usera")
+        if not time_tag or not user_tag:
+            continue  # Skip malformed lines
+        records.append(_oneliner_entry(
+            time_tag.get_text(strip=True),
+            time_tag.get("datetime"),
+            user_tag.get("title", "unknown"),
+            user_tag.get("href", "unknown"),
+            li.get_text(separator=" ", strip=True)
+        ))
+    return records
+
+
+def _extract_oneliners_selectolax(html):
+    tree = HTMLParser(html)
+    boxlist = tree.css_first("ul.boxlist")
+    if boxlist is None:
+        return None
+
+    records = []
+    for li in boxlist.css("li"):
+        if "day" in (li.attributes.get("class") or "").split():
+            records.append({"day": li.text(strip=True)})
+            continue
+        time_tag = li.css_first("time")
+        user_tag = li.css_first("a.usera")
+        if time_tag is None or user_tag is None:
+            continue  # Skip malformed lines
+        records.append(_oneliner_entry(
+            time_tag.text(strip=True),
+            time_tag.attributes.get("datetime"),
+            user_tag.attributes.get("title") or "unknown",
+            user_tag.attributes.get("href") or "unknown",
+            li.text(separator=" ", strip=True)
+        ))
+    return records
+
+
+def extract_oneliners(html, backend=None):
+    # Returns the oneliner page as a list of records, in page order:
+    # {"day": "YYYY-MM-DD"} for date headers,
+    # {"time", "datetime", "nickname", "user_id", "message"} for messages,
+    # or None if the oneliner list is not found.
+    backend = _resolve_backend(backend)
+    if backend == "selectolax":
+        return _extract_oneliners_selectolax(html)
+    return _extract_oneliners_bs4(html, backend)
+
+
+def format_oneliner_lines(records):
+    # Text format of the pouet_oneliners/ pages
+    lines = []
+    for record in records:
+        if "day" in record:
+            lines.append(record["day"])
+        else:
+            lines.append(f"{record['time']} {record['nickname']}[{record['user_id']}] : {record['message']}")
+    return lines
+
+
+# ----------- BBS topic pages -----------
+
+def _bbs_post(content, foot_text, user_nick, user_href):
+    date_match = BBS_DATE_REGEX.search(foot_text)
+    user_id_match = BBS_USER_ID_REGEX.search(user_href) if user_href else None
+    return {
+        "timestamp": date_match.group(1) if date_match else "unknown",
+        "user_nick": user_nick,
+        "user_id": user_id_match.group(1) if user_id_match else "?",
+        "content": content
+    }
+
+
+def _parse_bbs_bs4(html, parser):
+    soup = BeautifulSoup(html, parser)
+
+    select = soup.find("select", {"name": "page"})
+    total_pages = max([int(o.text) for o in select.find_all("option")]) if select else 1
+    h2 = soup.select_one("#pouetbox_bbsview h2")
+    title = h2.text.strip() if h2 else "untitled"
+
+    posts = []
+    for post_div in soup.find_all("div", class_="bbspost"):
+        content_tag = post_div.find("div", class_="content")
+        foot_tag = post_div.find("div", class_="foot")
+        if not content_tag or not foot_tag:
+            continue
+        user_link = foot_tag.find("a", href=BBS_USER_HREF_REGEX)
+        posts.append(_bbs_post(
+            content_tag.get_text(separator="\n").strip(),
+            foot_tag.text,
+            user_link.text.strip() if user_link else "unknown",
+            user_link["href"] if user_link else None
+        ))
+    return title, total_pages, posts
+
+
+def _parse_bbs_selectolax(html):
+    tree = HTMLParser(html)
+
+    options = tree.css('select[name="page"] option')
+    total_pages = max([int(o.text()) for o in options]) if options else 1
+    h2 = tree.css_first("#pouetbox_bbsview h2")
+    title = h2.text().strip() if h2 else "untitled"
+
+    posts = []
+    for post_div in tree.css("div.bbspost"):
+        content_tag = post_div.css_first("div.content")
+        foot_tag = post_div.css_first("div.foot")
+        if content_tag is None or foot_tag is None:
+            continue
+        user_link = next(
+            (a for a in foot_tag.css("a[href]") if BBS_USER_HREF_REGEX.search(a.attributes.get("href") or "")),
+            None
+        )
+        posts.append(_bbs_post(
+            content_tag.text(separator="\n").strip(),
+            foot_tag.text(),
+            user_link.text().strip() if user_link else "unknown",
+            user_link.attributes.get("href") if user_link else None
+        ))
+    return title, total_pages, posts
+
+
+def parse_bbs_page(html, backend=None):
+    # Returns (topic title, total number of pages, posts) for one page of a BBS topic,
+    # each post being {"timestamp", "user_nick", "user_id", "content"}
+    backend = _resolve_backend(backend)
+    if backend == "selectolax":
+        return _parse_bbs_selectolax(html)
+    return _parse_bbs_bs4(html, backend)
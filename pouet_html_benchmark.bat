@@ -0,0 +1,2 @@
+python pouet_html_benchmark.py
+pause
\ No newline at end of file
@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+from pouet_html import BACKENDS, extract_oneliners, parse_bbs_page
+from pouet_page_archive import ARCHIVE_FOLDER, PageArchive, read_page
+
+# Stored sample pages (raw HTML, as served by pouet.net, one .html file per page).
+# When a folder holds no sample, pages are taken from the raw HTML archive of the scrapers
+# (see pouet_page_archive.py).
+ONELINER_SAMPLES_FOLDER = "./html_samples/oneliner"
+BBS_SAMPLES_FOLDER = "./html_samples/bbs"
+ARCHIVE_SAMPLE_PAGES = 200  # Pages taken from the archive, spread over its whole history
+REPEAT = 3
+
+
+def load_samples(folder):
+    if not os.path.isdir(folder):
+        return []
+    pages = []
+    for filename in sorted(os.listdir(folder)):
+        if filename.endswith((".html", ".htm")):
+            with open(os.path.join(folder, filename), "r", encoding="utf-8") as f:
+                pages.append(f.read())
+    return pages
+
+
+def load_archive_samples(kind, max_pages=ARCHIVE_SAMPLE_PAGES):
+    if not os.path.isdir(ARCHIVE_FOLDER):
+        return []
+    entries = sorted(PageArchive().entries(kind), key=lambda entry: entry["key"])
+    step = max(1, len(entries) // max_pages)
+    return [read_page(ARCHIVE_FOLDER, entry) for entry in entries[::step][:max_pages]]
+
+
+def benchmark(name, extract, pages):
+    if not pages:
+        print(f"No {name} sample pages found, skipping.")
+        return
+
+    total_mb = sum(len(page.encode("utf-8")) for page in pages) / (1024 * 1024)
+    reference = [extract(page, "html.parser") for page in pages]
+    print(f"\n{name}: {len(pages)} pages, {total_mb:.1f} MB")
+
+    for backend in BACKENDS:
+        start_time = time.perf_counter()
+        for _ in range(REPEAT):
+            results = [extract(page, backend) for page in pages]
+        elapsed = (time.perf_counter() - start_time) / REPEAT
+
+        # Every backend must return the same records as the historical html.parser
+        mismatches = sum(result != expected for result, expected in zip(results, reference))
+        status = "OK" if mismatches == 0 else f"{mismatches} page(s) differ from html.parser"
+        print(f"  {backend:<12} {len(pages) / elapsed:8.1f} pages/s {total_mb / elapsed:8.2f} MB/s  {status}")
+
+
+if __name__ == "__main__":
+    oneliner_folder = sys.argv[1] if len(sys.argv) > 1 else ONELINER_SAMPLES_FOLDER
+    bbs_folder = sys.argv[2] if len(sys.argv) > 2 else BBS_SAMPLES_FOLDER
+    print(f"Available backends: {', '.join(BACKENDS)}")
+    benchmark("Oneliner", extract_oneliners, load_samples(oneliner_folder) or load_archive_samples("oneliner"))
+    benchmark("BBS", parse_bbs_page, load_samples(bbs_folder) or load_archive_samples("bbs"))
@@ -0,0 +1,108 @@
+import time
+import random
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# Friendly browser signature
+HEADERS = {
+    "User-Agent": (
+        "AstrofraResearchBot/1.0 (+https://www.pouet.net/user.php?who=38632 ; contact: astrofra@gmail.com)"
+    )
+}
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def _interruptible_sleep(delay, stop=None):
+    # True if `stop` was set, before or during the sleep
+    if stop is None:
+        time.sleep(delay)
+        return False
+    return stop.wait(delay)
+
+
+class TokenBucket:
+    # Politeness limit shared by all the workers: `rate` requests per second on average,
+    # with bursts of at most `capacity` requests.
+    # The rate is halved when the server pushes back (429 / 5xx), and slowly
+    # restored towards its nominal value on each successful request.
+    def __init__(self, rate, capacity=1, min_rate=None):
+        self.nominal_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 16
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def acquire(self, stop=None):
+        # False if `stop` (a threading.Event) is set before a token is available
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if _interruptible_sleep(wait, stop):
+                return False
+
+    def slow_down(self):
+        with self.lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def recover(self):
+        with self.lock:
+            self._refill()
+            self.rate = min(self.nominal_rate, self.rate * 1.1)
+
+
+def make_session(pool_size=4):
+    # One session per crawl: TLS connections are kept alive and reused by all the workers
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def polite_get(session, url, bucket, max_retries=5, base_backoff=30, timeout=30, stop=None):
+    # GET through the shared rate limiter, with an adaptive exponential backoff on 429 / 5xx
+    # (the Retry-After header is honored when the server sends one).
+    # Returns the last response, or None if the request could not be sent at all.
+    # Once `stop` (a threading.Event) is set, no other request or retry is sent.
+    response = None
+    for attempt in range(max_retries + 1):
+        if not bucket.acquire(stop):
+            break
+        try:
+            response = session.get(url, timeout=timeout)
+        except requests.RequestException as e:
+            print(f"Request error on {url}: {e}")
+            response = None
+        else:
+            if response.status_code not in RETRY_STATUS_CODES:
+                bucket.recover()
+                return response
+
+        if attempt == max_retries:
+            break
+        bucket.slow_down()
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = int(retry_after)
+        else:
+            delay = base_backoff * (2 ** attempt) * random.uniform(0.75, 1.25)
+        status = response.status_code if response is not None else "no response"
+        print(f"{url}: {status}, backing off {delay:.0f}s (attempt {attempt + 1}/{max_retries}).")
+        if _interruptible_sleep(delay, stop):
+            break
+    return response
@@ -0,0 +1,83 @@
+import os
+import json
+import pandas as pd
+from oneliner_corpus import load_oneliners
+from pouet_user import fetch_user_nicknames
+
+BBS_FOLDER = "./bbs"
+
+
+def load_bbs_authors(bbs_folder=BBS_FOLDER):
+    # (datetime, pouet_id, nickname) of every BBS post found in the bbs/ JSON files
+    datetimes, pouet_ids, nicknames = [], [], []
+    if not os.path.isdir(bbs_folder):
+        return pd.DataFrame({"datetime": pd.to_datetime([]), "pouet_id": [], "nickname": []})
+    with os.scandir(bbs_folder) as it:
+        for entry in it:
+            if not entry.name.endswith(".json"):
+                continue
+            with open(entry.path, "r", encoding="utf-8") as f:
+                try:
+                    topic = json.load(f)
+                except json.JSONDecodeError:
+                    print(f"Invalid JSON file: {entry.name}")
+                    continue
+            for post in topic.get("posts", []):
+                try:
+                    pouet_id = int(post.get("user_id"))
+                except (TypeError, ValueError):
+                    continue  # "?" when the author link could not be parsed
+                datetimes.append(post.get("timestamp"))
+                pouet_ids.append(pouet_id)
+                nicknames.append(post.get("user_nick"))
+    return pd.DataFrame({
+        "datetime": pd.to_datetime(datetimes, format="%Y-%m-%d %H:%M:%S", errors="coerce"),
+        "pouet_id": pouet_ids,
+        "nickname": nicknames
+    })
+
+
+def build_nickname_index(oneliners_df=None, bbs_folder=BBS_FOLDER):
+    # Every oneliner line and BBS post carries the nickname of its author at that time.
+    # Returns a DataFrame indexed by pouet_id: nickname (the most recent one), first_seen, last_seen.
+    if oneliners_df is None:
+        oneliners_df = load_oneliners()
+    authors = pd.concat([
+        pd.DataFrame({
+            "datetime": oneliners_df["datetime"].values,
+            "pouet_id": oneliners_df["pouet_id"].values,
+            "nickname": oneliners_df["nickname"].astype(object).values
+        }),
+        load_bbs_authors(bbs_folder)
+    ], ignore_index=True)
+    authors = authors.dropna(subset=["datetime", "nickname"])
+    authors = authors[authors["nickname"] != ""]
+
+    # One pass: sorted by date, the last row of each user holds their latest nickname
+    authors = authors.sort_values("datetime", kind="stable")
+    grouped = authors.groupby("pouet_id", sort=True)
+    index = grouped.agg(
+        nickname=("nickname", "last"),
+        first_seen=("datetime", "first"),
+        last_seen=("datetime", "last")
+    )
+    index.index = index.index.astype("int32")
+    return index
+
+
+def resolve_nicknames(user_ids, nickname_index, cache_folder=None):
+    # {user_id: nickname} from the local index. Ids never seen locally are asked to the pouet.net API
+    # (in one batch) only if a user cache folder is given, otherwise they are labelled "ID <id>":
+    # pass no cache folder where a slow API call must never block (e.g. chart generation).
+    nicknames, unknown_ids = {}, []
+    for user_id in user_ids:
+        if user_id in nickname_index.index:
+            nicknames[user_id] = nickname_index.at[user_id, "nickname"]
+        else:
+            unknown_ids.append(user_id)
+            nicknames[user_id] = f"ID {user_id}"
+    if unknown_ids and cache_folder is not None:
+        fetched = fetch_user_nicknames(unknown_ids, cache_folder)
+        for user_id in unknown_ids:
+            nicknames[user_id] = fetched[int(user_id)]
+    return nicknames
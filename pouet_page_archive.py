@@ -0,0 +1,111 @@
+import os
+import gzip
+import json
+import hashlib
+import threading
+from datetime import datetime
+
+try:
+    import zstandard  # Optional: better ratio and much faster than gzip
+except ImportError:
+    zstandard = None
+
+ARCHIVE_FOLDER = "./html_archive"
+INDEX_FILENAME = "index_{}.jsonl"  # One index per kind of page
+PACK_FILENAME = "{}_pack_{:05d}.bin"  # One series of packs per kind of page
+LEGACY_INDEX_FILENAME = "index.jsonl"  # Former single index of all kinds, read only
+LEGACY_PACK_FILENAME = "pack_{:05d}.bin"
+PACK_MAX_SIZE = 256 * 1024 * 1024
+
+
+class PageArchive:
+    # Content-addressed archive of the raw HTML pages fetched by the scrapers.
+    # Every distinct page content is compressed on its own (one gzip member or zstd frame)
+    # and appended to a few large pack files. index_<kind>.jsonl maps each logical page
+    # ("oneliner", "123") to the sha1 of its content, and each sha1 to its pack file/offset/length.
+    # An already known content (same sha1) is never stored twice.
+    # Each kind has its own packs and index: the scrapers of different kinds run as separate
+    # processes, each one only appends to its own files. Two processes must not add the same kind.
+    def __init__(self, folder=ARCHIVE_FOLDER):
+        self.folder = folder
+        self.lock = threading.Lock()
+        self.blobs = {}  # sha1 -> {"pack", "file", "offset", "length", "codec"}
+        self.pages = {}  # (kind, key) -> latest index entry
+        os.makedirs(folder, exist_ok=True)
+        self._load_index(LEGACY_INDEX_FILENAME)
+        for filename in sorted(os.listdir(folder)):
+            if filename != LEGACY_INDEX_FILENAME and filename.startswith("index_") and filename.endswith(".jsonl"):
+                self._load_index(filename)
+
+    def _load_index(self, filename):
+        index_file = os.path.join(self.folder, filename)
+        if not os.path.exists(index_file):
+            return
+        with open(index_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn last line after a crash
+                entry.setdefault("file", LEGACY_PACK_FILENAME.format(entry["pack"]))
+                self.blobs.setdefault(entry["sha1"], {k: entry[k] for k in ("pack", "file", "offset", "length", "codec")})
+                self.pages[(entry["kind"], entry["key"])] = entry
+
+    def _current_pack(self, kind):
+        pack = max(
+            (blob["pack"] for blob in self.blobs.values() if blob["file"] == PACK_FILENAME.format(kind, blob["pack"])),
+            default=0
+        )
+        pack_path = os.path.join(self.folder, PACK_FILENAME.format(kind, pack))
+        if os.path.exists(pack_path) and os.path.getsize(pack_path) >= PACK_MAX_SIZE:
+            pack += 1
+        return pack
+
+    def add(self, kind, key, html):
+        data = html.encode("utf-8")
+        sha1 = hashlib.sha1(data).hexdigest()
+        if zstandard is not None:
+            codec, compressed = "zstd", zstandard.ZstdCompressor(level=10).compress(data)
+        else:
+            codec, compressed = "gzip", gzip.compress(data, compresslevel=6)
+
+        with self.lock:
+            if sha1 not in self.blobs:
+                pack = self._current_pack(kind)
+                pack_file = PACK_FILENAME.format(kind, pack)
+                with open(os.path.join(self.folder, pack_file), "ab") as f:
+                    offset = f.tell()
+                    f.write(compressed)
+                self.blobs[sha1] = {
+                    "pack": pack, "file": pack_file, "offset": offset, "length": len(compressed), "codec": codec
+                }
+
+            entry = {
+                "kind": kind,
+                "key": str(key),
+                "sha1": sha1,
+                "fetched_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                **self.blobs[sha1]
+            }
+            with open(os.path.join(self.folder, INDEX_FILENAME.format(kind)), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            self.pages[(kind, str(key))] = entry
+        return sha1
+
+    def entries(self, kind):
+        # Latest version of every page of a kind
+        return [entry for (entry_kind, _), entry in self.pages.items() if entry_kind == kind]
+
+
+def read_page(folder, entry):
+    # Standalone reader (no index loading), so it can be used from worker processes
+    with open(os.path.join(folder, entry["file"]), "rb") as f:
+        f.seek(entry["offset"])
+        compressed = f.read(entry["length"])
+    if entry["codec"] == "zstd":
+        if zstandard is None:
+            raise RuntimeError(f"Page {entry['kind']} {entry['key']} is zstd-compressed, install zstandard to read it")
+        data = zstandard.ZstdDecompressor().decompress(compressed)
+    else:
+        data = gzip.decompress(compressed)
+    return data.decode("utf-8")
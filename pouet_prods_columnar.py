@@ -0,0 +1,123 @@
+import os
+from datetime import date
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+from pouet_prods_sqlite import _to_int, prod_placings
+
+PRODS_ARROW_FILE = "db/prods.arrow"
+PRODS_PARQUET_FILE = "db/prods.parquet"
+RECORD_BATCH_SIZE = 10000
+
+
+def _to_date(value):
+    # Pouet uses "00" for an unknown month or day ("1995-04-00", "1995-00-00"):
+    # these dates are mapped to the first day of the month, or of the year
+    if not value:
+        return None
+    parts = value[:10].split("-")
+    if len(parts) != 3:
+        return None
+    year, month, day = (_to_int(part) for part in parts)
+    if year is None or month is None or day is None:
+        return None
+    try:
+        return date(year, month or 1, day or 1)
+    except ValueError:
+        return None
+
+
+def prods_schema():
+    return pa.schema([
+        ("id", pa.int32()),
+        ("name", pa.string()),
+        ("type", pa.string()),
+        ("release_date", pa.date32()),
+        ("release_year", pa.int16()),
+        ("platform_ids", pa.list_(pa.int32())),
+        ("group_ids", pa.list_(pa.int32())),
+        ("party_id", pa.int32()),
+        ("rank", pa.int32()),
+        ("download", pa.string()),
+        ("local_link", pa.string()),
+    ])
+
+
+def _empty_columns(schema):
+    return {name: [] for name in schema.names}
+
+
+def _append_prod(columns, prod):
+    party_id = None
+    for party, _ in prod_placings(prod):
+        party_id = _to_int(party.get('id'))
+        break
+    columns["id"].append(_to_int(prod.get('id')))
+    columns["name"].append(prod.get('name'))
+    columns["type"].append(prod.get('type'))
+    columns["release_date"].append(_to_date(prod.get('releaseDate')))
+    # Same as the release_year of pouet_prods_sqlite.py, set even when the date is not valid
+    columns["release_year"].append(_to_int((prod.get('releaseDate') or '')[:4]))
+    columns["platform_ids"].append([_to_int(platform_id) for platform_id in (prod.get('platforms') or {})])
+    columns["group_ids"].append([_to_int(group.get('id')) for group in prod.get('groups') or []])
+    columns["party_id"].append(party_id)
+    columns["rank"].append(_to_int(prod.get('rank')))
+    columns["download"].append(prod.get('download'))
+    columns["local_link"].append(prod.get('local_link'))
+
+
+def iter_prods_record_batches(prods, batch_size=RECORD_BATCH_SIZE):
+    # Flattens the prods into typed Arrow record batches, without holding them all in memory
+    schema = prods_schema()
+    columns = _empty_columns(schema)
+    count = 0
+    for prod in prods:
+        _append_prod(columns, prod)
+        count += 1
+        if count == batch_size:
+            yield pa.record_batch([columns[name] for name in schema.names], schema=schema)
+            columns = _empty_columns(schema)
+            count = 0
+    if count:
+        yield pa.record_batch([columns[name] for name in schema.names], schema=schema)
+
+
+def export_prods_columnar(prods, arrow_file=PRODS_ARROW_FILE, parquet_file=PRODS_PARQUET_FILE):
+    # The Arrow IPC file is left uncompressed so it can be memory-mapped,
+    # the Parquet copy is the compact one for other tools.
+    if pa is None:
+        print("pyarrow is not installed, skipping the columnar export.")
+        return None
+
+    os.makedirs(os.path.dirname(arrow_file), exist_ok=True)
+    schema = prods_schema()
+    tmp_file = arrow_file + '.tmp'
+    with pa.OSFile(tmp_file, 'wb') as sink:
+        with pa.ipc.new_file(sink, schema) as writer:
+            for batch in iter_prods_record_batches(prods):
+                writer.write_batch(batch)
+    os.replace(tmp_file, arrow_file)
+    print(f"Exported : {arrow_file}")
+
+    if parquet_file:
+        table = read_prods_columnar(arrow_file=arrow_file, as_pandas=False)
+        tmp_file = parquet_file + '.tmp'
+        pq.write_table(table, tmp_file, compression='zstd')
+        os.replace(tmp_file, parquet_file)
+        print(f"Exported : {parquet_file}")
+    return arrow_file
+
+
+def read_prods_columnar(columns=None, arrow_file=PRODS_ARROW_FILE, as_pandas=True):
+    # Memory-mapped read: only the projected `columns` are actually touched on disk
+    # e.g. read_prods_columnar(["id", "release_date", "platform_ids"])
+    source = pa.memory_map(arrow_file, 'r')
+    table = pa.ipc.open_file(source).read_all()
+    if columns is not None:
+        table = table.select(columns)
+    return table.to_pandas() if as_pandas else table
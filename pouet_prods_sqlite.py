@@ -0,0 +1,172 @@
+import os
+import json
+import sqlite3
+
+PRODS_DB_FILE = "db/prods.sqlite"
+INSERT_BATCH_SIZE = 5000
+
+SCHEMA = """
+CREATE TABLE prods (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    type TEXT,
+    release_date TEXT,
+    release_year INTEGER,
+    rank INTEGER,
+    download TEXT,
+    local_link TEXT,
+    local_status TEXT,
+    data TEXT
+);
+CREATE TABLE platforms (id INTEGER PRIMARY KEY, name TEXT);
+CREATE TABLE prod_platforms (prod_id INTEGER, platform_id INTEGER, PRIMARY KEY (prod_id, platform_id));
+CREATE TABLE groups (id INTEGER PRIMARY KEY, name TEXT, acronym TEXT);
+CREATE TABLE prod_groups (prod_id INTEGER, group_id INTEGER, PRIMARY KEY (prod_id, group_id));
+CREATE TABLE parties (id INTEGER PRIMARY KEY, name TEXT);
+CREATE TABLE prod_parties (prod_id INTEGER, party_id INTEGER, year INTEGER, compo TEXT, ranking TEXT);
+CREATE TABLE credits (prod_id INTEGER, user_id INTEGER, nickname TEXT, role TEXT);
+"""
+
+# Created after the bulk load, it is much faster than maintaining them row by row
+INDEXES = """
+CREATE INDEX idx_prods_release_year ON prods (release_year);
+CREATE INDEX idx_platforms_name ON platforms (name);
+CREATE INDEX idx_prod_platforms_platform ON prod_platforms (platform_id, prod_id);
+CREATE INDEX idx_groups_name ON groups (name);
+CREATE INDEX idx_prod_groups_group ON prod_groups (group_id, prod_id);
+CREATE INDEX idx_parties_name ON parties (name);
+CREATE INDEX idx_prod_parties_party ON prod_parties (party_id, year, prod_id);
+CREATE INDEX idx_prod_parties_prod ON prod_parties (prod_id);
+CREATE INDEX idx_credits_prod ON credits (prod_id);
+CREATE INDEX idx_credits_user ON credits (user_id);
+"""
+
+INSERTS = {
+    "prods": "INSERT OR REPLACE INTO prods VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+    "platforms": "INSERT OR IGNORE INTO platforms VALUES (?, ?)",
+    "prod_platforms": "INSERT OR IGNORE INTO prod_platforms VALUES (?, ?)",
+    "groups": "INSERT OR IGNORE INTO groups VALUES (?, ?, ?)",
+    "prod_groups": "INSERT OR IGNORE INTO prod_groups VALUES (?, ?)",
+    "parties": "INSERT OR IGNORE INTO parties VALUES (?, ?)",
+    "prod_parties": "INSERT INTO prod_parties VALUES (?, ?, ?, ?, ?)",
+    "credits": "INSERT INTO credits VALUES (?, ?, ?, ?)",
+}
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def prod_placings(prod):
+    # Dumps list the parties in "placings", the API uses "party" / "party_year" / "party_compo"
+    placings = prod.get('placings') or []
+    if not placings and isinstance(prod.get('party'), dict):
+        placings = [{
+            "party": prod['party'],
+            "year": prod.get('party_year'),
+            "compo": prod.get('party_compo'),
+            "ranking": prod.get('party_place')
+        }]
+    for placing in placings:
+        party = placing.get('party') or {}
+        if _to_int(party.get('id')) is not None:
+            yield party, placing
+
+
+def prod_rows(prod):
+    # Splits one prod into rows for each table: {table: [row, ...]}
+    prod_id = _to_int(prod.get('id'))
+    release_date = prod.get('releaseDate') or None
+    rows = {table: [] for table in INSERTS}
+    rows["prods"].append((
+        prod_id,
+        prod.get('name'),
+        prod.get('type'),
+        release_date,
+        _to_int(release_date[:4]) if release_date else None,
+        _to_int(prod.get('rank')),
+        prod.get('download'),
+        prod.get('local_link'),
+        prod.get('local_status'),
+        json.dumps(prod, ensure_ascii=False, separators=(',', ':'))
+    ))
+    for platform_id, platform in (prod.get('platforms') or {}).items():
+        rows["platforms"].append((_to_int(platform_id), platform.get('name')))
+        rows["prod_platforms"].append((prod_id, _to_int(platform_id)))
+    for group in prod.get('groups') or []:
+        group_id = _to_int(group.get('id'))
+        if group_id is not None:
+            rows["groups"].append((group_id, group.get('name'), group.get('acronym')))
+            rows["prod_groups"].append((prod_id, group_id))
+    for party, placing in prod_placings(prod):
+        party_id = _to_int(party.get('id'))
+        rows["parties"].append((party_id, party.get('name')))
+        rows["prod_parties"].append((prod_id, party_id, _to_int(placing.get('year')), placing.get('compo'), placing.get('ranking')))
+    for credit in prod.get('credits') or []:
+        user = credit.get('user') or {}
+        rows["credits"].append((prod_id, _to_int(user.get('id')), user.get('nickname'), credit.get('role')))
+    return rows
+
+
+def export_prods_sqlite(prods, db_file=PRODS_DB_FILE):
+    # Rebuilds the whole database in a temporary file, with batched inserts in a single
+    # transaction, then swaps it with the previous one so readers never see a partial db.
+    os.makedirs(os.path.dirname(db_file), exist_ok=True)
+    tmp_file = db_file + '.tmp'
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+
+    conn = sqlite3.connect(tmp_file)
+    prod_count = 0
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.executescript(SCHEMA)
+        batch = {table: [] for table in INSERTS}
+        with conn:
+            for prod in prods:
+                for table, rows in prod_rows(prod).items():
+                    batch[table].extend(rows)
+                prod_count += 1
+                if prod_count % INSERT_BATCH_SIZE == 0:
+                    for table, rows in batch.items():
+                        conn.executemany(INSERTS[table], rows)
+                        rows.clear()
+            for table, rows in batch.items():
+                conn.executemany(INSERTS[table], rows)
+        conn.executescript(INDEXES)
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+    os.replace(tmp_file, db_file)
+    print(f"Exported : {db_file} ({prod_count} prods)")
+    return db_file
+
+
+def find_prods(conn, platform=None, group=None, party=None, year=None):
+    # e.g. find_prods(conn, platform="Amiga AGA", party="Revision")
+    query = "SELECT DISTINCT prods.id, prods.name, prods.type, prods.release_date, prods.local_link FROM prods"
+    conditions = []
+    params = []
+    if platform is not None:
+        query += " JOIN prod_platforms ON prod_platforms.prod_id = prods.id JOIN platforms ON platforms.id = prod_platforms.platform_id"
+        conditions.append("platforms.name = ?")
+        params.append(platform)
+    if group is not None:
+        query += " JOIN prod_groups ON prod_groups.prod_id = prods.id JOIN groups ON groups.id = prod_groups.group_id"
+        conditions.append("groups.name = ?")
+        params.append(group)
+    if party is not None:
+        query += " JOIN prod_parties ON prod_parties.prod_id = prods.id JOIN parties ON parties.id = prod_parties.party_id"
+        conditions.append("parties.name = ?")
+        params.append(party)
+    if year is not None:
+        conditions.append("prods.release_year = ?")
+        params.append(year)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return conn.execute(query, params).fetchall()
@@ -0,0 +1,2 @@
+python pouet_reparse.py
+pause
\ No newline at end of file
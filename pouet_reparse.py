@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from multiprocessing import Pool
+from pouet_page_archive import ARCHIVE_FOLDER, PageArchive, read_page
+from pouet_html import extract_oneliners, parse_bbs_page
+from oneliner_store import ONELINER_STORE_FILE, OnelinerStore, page_oneliner_records, iter_store_records
+from oneliner_corpus import backfill_store
+from oneliner_downloader import output_dir as ONELINER_FOLDER, save_page
+from pouet_fetch_all_bbs import save_topic_files, remove_stale_topic_files
+
+# Rebuilds pouet_oneliners/ and bbs/ from the raw HTML archive, on all CPU cores,
+# e.g. after fixing a parsing bug. Nothing is fetched from pouet.net.
+# Usage: pouet_reparse.py [oneliner] [bbs] [backfill]
+# "backfill" imports into the typed oneliner store the text pages it does not hold yet.
+
+
+def reparse_oneliner_page(entry):
+    records = extract_oneliners(read_page(ARCHIVE_FOLDER, entry))
+    if records is None:
+        return entry["key"], "Boxlist not found"
+    save_page(int(entry["key"]), records)
+    # The typed records are appended by the main process, the store is not shared between processes
+    return entry["key"], page_oneliner_records(records, int(entry["key"]))
+
+
+def reparse_bbs_topic(topic):
+    topic_id, entries = topic
+    title, all_posts = "untitled", []
+    for page, entry in sorted(entries, key=lambda e: e[0]):
+        page_title, _, posts = parse_bbs_page(read_page(ARCHIVE_FOLDER, entry))
+        if page == 1:
+            title = page_title
+        all_posts += posts
+    if not all_posts:
+        return topic_id, "No posts found"
+    creation_date = datetime.strptime(all_posts[0]['timestamp'], "%Y-%m-%d %H:%M:%S")
+    filename_base = save_topic_files(topic_id, creation_date, title, all_posts)
+    remove_stale_topic_files(topic_id, filename_base)
+    return topic_id, None
+
+
+def run(pool, name, function, jobs, store=None):
+    # Returns the keys of the jobs rebuilt without error
+    start_time = time.time()
+    rebuilt = set()
+    for key, result in pool.imap_unordered(function, jobs, chunksize=16):
+        if isinstance(result, str):
+            print(f"[{name} {key}] {result}")
+            continue
+        rebuilt.add(key)
+        if store is not None and result:
+            store.append(result)
+    print(f"{name}: {len(rebuilt)} rebuilt ({len(jobs) - len(rebuilt)} errors) in {time.time() - start_time:.1f}s")
+    return rebuilt
+
+
+def main(kinds):
+    archive = PageArchive()
+    with Pool(os.cpu_count()) as pool:
+        if "oneliner" in kinds:
+            os.makedirs(ONELINER_FOLDER, exist_ok=True)
+            # The records of the reparsed pages are replaced by the ones of the new parser,
+            # the records of the other pages (never archived, or failing to parse) are kept
+            rebuild_file = ONELINER_STORE_FILE + ".rebuild"
+            if os.path.exists(rebuild_file):
+                os.remove(rebuild_file)
+            rebuild_store = OnelinerStore(rebuild_file)
+            rebuilt = run(pool, "oneliner", reparse_oneliner_page, archive.entries("oneliner"), rebuild_store)
+            rebuilt_pages = {int(key) for key in rebuilt}
+            kept = rebuild_store.append(
+                record for record in iter_store_records(ONELINER_STORE_FILE) if record["page"] not in rebuilt_pages
+            )
+            print(f"oneliner: {kept} stored records of pages not reparsed kept")
+            if os.path.exists(rebuild_file):
+                os.replace(rebuild_file, ONELINER_STORE_FILE)
+
+        if "bbs" in kinds:
+            # All the pages of a topic go to the same worker
+            topics = defaultdict(list)
+            for entry in archive.entries("bbs"):
+                topic_id, page = entry["key"].split(":")
+                topics[int(topic_id)].append((int(page), entry))
+            run(pool, "bbs", reparse_bbs_topic, list(topics.items()))
+
+    if "backfill" in kinds:
+        backfill_store(ONELINER_FOLDER, ONELINER_STORE_FILE)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or ["oneliner", "bbs"])
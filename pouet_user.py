@@ -1,46 +1,222 @@
-import requests
-import random
-import time
 import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pouet_http import TokenBucket, make_session, polite_get
 
-def fetch_user_nickname_from_id(cache_folder, user_id):
-    cache_file_txt = os.path.join(cache_folder, f"{user_id}.txt")
-    cache_file_json = os.path.join(cache_folder, f"{user_id}.json")
+USER_STORE_FILE = "pouet_users.sqlite"
+USER_CACHE_FOLDER = "./pouet_users"  # Legacy cache: <id>.txt + <id>.json per user
+LRU_SIZE = 65536
+
+API_URL = "https://api.pouet.net/v1/user/?id={}"
+# Politeness limit of the whole process on api.pouet.net. The default is the pace of the former
+# 10-15 s sleep after each call; long crawls should go slower (see set_api_rate).
+API_REQUESTS_PER_MINUTE = 5
+API_WORKERS = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY,
+    nickname TEXT,
+    raw_json TEXT,
+    fetched_at TEXT,
+    not_found INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+class UserStore:
+    # All the users fetched from the pouet.net API, in a single SQLite file (WAL mode, so
+    # readers never wait for the crawler). Ids that do not exist are stored too (not_found = 1),
+    # so they are never asked again. A process-local LRU answers repeated lookups from memory.
+    def __init__(self, db_file=USER_STORE_FILE, lru_size=LRU_SIZE):
+        self.db_file = db_file
+        self.lock = threading.Lock()
+        self.lru = OrderedDict()  # user_id -> (nickname, not_found), or None when not stored
+        self.lru_size = lru_size
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def _remember(self, user_id, value):
+        self.lru[user_id] = value
+        self.lru.move_to_end(user_id)
+        if len(self.lru) > self.lru_size:
+            self.lru.popitem(last=False)
+
+    def get(self, user_id):
+        # (nickname, not_found) of a stored user, None if the id was never fetched
+        user_id = int(user_id)
+        with self.lock:
+            if user_id in self.lru:
+                self.lru.move_to_end(user_id)
+                return self.lru[user_id]
+            row = self.conn.execute(
+                "SELECT nickname, not_found FROM users WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            value = (row[0], bool(row[1])) if row else None
+            self._remember(user_id, value)
+            return value
+
+    def put(self, user_id, nickname, raw_json=None, not_found=False, fetched_at=None):
+        user_id = int(user_id)
+        fetched_at = fetched_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self.lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?, ?)",
+                    (user_id, nickname, raw_json, fetched_at, int(not_found))
+                )
+            self._remember(user_id, (nickname, bool(not_found)))
+
+    def iter_raw_json(self):
+        # Raw API answer of every user found
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT raw_json FROM users WHERE not_found = 0 AND raw_json IS NOT NULL ORDER BY user_id"
+            ).fetchall()
+        for (raw_json,) in rows:
+            yield raw_json
+
+    def iter_known_ids(self):
+        # (user_id, not_found) of every id already fetched
+        with self.lock:
+            rows = self.conn.execute("SELECT user_id, not_found FROM users ORDER BY user_id").fetchall()
+        for user_id, not_found in rows:
+            yield user_id, bool(not_found)
+
+    def migrate_folder(self, folder=USER_CACHE_FOLDER):
+        # One-shot import of the legacy pouet_users/ folder, remembered in the meta table
+        key = f"migrated:{os.path.abspath(folder)}"
+        with self.lock:
+            if self.conn.execute("SELECT 1 FROM meta WHERE key = ?", (key,)).fetchone():
+                return 0
+        if not os.path.isdir(folder):
+            return 0
+
+        rows = []
+        with os.scandir(folder) as it:
+            for entry in it:
+                name, extension = os.path.splitext(entry.name)
+                if extension != ".txt" or not name.isdigit():
+                    continue
+                with open(entry.path, "r", encoding="utf-8") as f:
+                    nickname = f.read().strip()
+                raw_json = None
+                json_path = os.path.join(folder, name + ".json")
+                if os.path.exists(json_path):
+                    with open(json_path, "r", encoding="utf-8") as f:
+                        raw_json = f.read()
+                fetched_at = datetime.fromtimestamp(entry.stat().st_mtime).strftime("%Y-%m-%d %H:%M:%S")
+                rows.append((int(name), nickname, raw_json, fetched_at, 0))
+
+        with self.lock:
+            with self.conn:
+                # Users already fetched into the store are newer than the legacy files
+                self.conn.executemany("INSERT OR IGNORE INTO users VALUES (?, ?, ?, ?, ?)", rows)
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+                )
+            self.lru.clear()
+        print(f"Migrated {len(rows)} users from {folder} to {self.db_file}")
+        return len(rows)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
 
-    user_id_to_nick = None
 
-    if os.path.exists(cache_file_txt):
-        with open(cache_file_txt, "r", encoding="utf-8") as f:
-            nickname = f.read().strip()
-        user_id_to_nick = nickname
-    else:
+def open_user_store(db_file=USER_STORE_FILE, legacy_folder=USER_CACHE_FOLDER):
+    # One store per file and per process, shared by every caller (and its LRU with it)
+    with _stores_lock:
+        if db_file not in _stores:
+            store = UserStore(db_file)
+            if legacy_folder:
+                store.migrate_folder(legacy_folder)
+            _stores[db_file] = store
+        return _stores[db_file]
+
+
+# Shared by every API call of the process: the rate limiter, not a sleep after each call, paces the requests
+_api_bucket = TokenBucket(API_REQUESTS_PER_MINUTE / 60)
+_api_session = make_session(API_WORKERS)
+
+
+def set_api_rate(requests_per_minute):
+    # Changes the pace of all the following API calls of the process
+    global _api_bucket
+    _api_bucket = TokenBucket(requests_per_minute / 60)
+
+
+def _fetch_user(store, user_id, stop=None):
+    # (nickname, not_found) from the API, stored; None on errors (not cached, asked again next time)
+    response = polite_get(_api_session, API_URL.format(user_id), _api_bucket, stop=stop)
+    if response is None:
+        return None
+    if response.status_code == 404:
+        print(f"ID {user_id} not found!")
+        store.put(user_id, None, not_found=True)
+        return None, True
+    if response.status_code != 200:
+        print(f"ID {user_id}: HTTP {response.status_code}")
+        return None
+
+    try:
+        json_data = response.json()
+    except ValueError:
+        print(f"ID {user_id}: invalid JSON answer")
+        return None
+    if json_data.get("success") and "user" in json_data:
+        nickname = json_data["user"].get("nickname", f"ID {user_id}")
+        store.put(user_id, nickname, response.text)
+        return nickname, False
+    print(f"ID {user_id} not found!")
+    store.put(user_id, None, response.text, not_found=True)
+    return None, True
+
+
+def fetch_users(user_ids, cache_folder=USER_CACHE_FOLDER, workers=API_WORKERS):
+    # {user_id: (nickname, not_found)} for a batch of ids, None for the ids that could not be fetched.
+    # Ids are deduplicated and answered from the store first; only the misses are fetched,
+    # concurrently, through the shared rate limiter.
+    store = open_user_store(legacy_folder=cache_folder)
+    users, misses = {}, []
+    for user_id in dict.fromkeys(int(user_id) for user_id in user_ids):
+        cached = store.get(user_id)
+        if cached is None:
+            misses.append(user_id)
+        else:
+            users[user_id] = cached
+
+    if misses:
+        print(f"Fetching {len(misses)} user(s) from the pouet.net API...")
+        # On Ctrl-C, the workers send no other API call and are not waited for.
+        # The users fetched before the interruption are in the store.
+        stop = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=workers)
         try:
-            url = f"https://api.pouet.net/v1/user/?id={user_id}"
-            response = requests.get(url)
-            if response.status_code == 200:
-                json_data = response.json()
-                if json_data.get("success") and "user" in json_data:
-                    nickname = json_data["user"].get("nickname", f"ID {user_id}")
-                    user_id_to_nick = nickname
-
-                    # Save nickname
-                    with open(cache_file_txt, "w", encoding="utf-8") as f:
-                        f.write(nickname)
-
-                    # Save full JSON data
-                    with open(cache_file_json, "w", encoding="utf-8") as f:
-                        f.write(response.text)
-                else:
-                    print(f"ID {user_id} not found!")
-                    user_id_to_nick = f"ID {user_id}"
-            else:
-                print("response.status_code" + response.status_code)
-                user_id_to_nick = f"ID {user_id}"
-        except Exception:
-            user_id_to_nick = f"ID {user_id}"
-
-        delay = 5 + random.uniform(5, 10)
-        print(f"Waiting {delay:.1f}s before next API call...")
-        time.sleep(delay)
-
-    return user_id_to_nick
\ No newline at end of file
+            for user_id, user in zip(misses, executor.map(lambda user_id: _fetch_user(store, user_id, stop), misses)):
+                users[user_id] = user
+        except KeyboardInterrupt:
+            stop.set()
+            raise
+        finally:
+            executor.shutdown(wait=not stop.is_set(), cancel_futures=True)
+    return users
+
+
+def fetch_user_nicknames(user_ids, cache_folder=USER_CACHE_FOLDER, workers=API_WORKERS):
+    # {user_id: nickname}, "ID <id>" for unknown users
+    return {
+        user_id: user[0] if user and user[0] and not user[1] else f"ID {user_id}"
+        for user_id, user in fetch_users(user_ids, cache_folder, workers).items()
+    }
+
+
+def fetch_user_nickname_from_id(cache_folder, user_id):
+    # `cache_folder` is the legacy pouet_users/ folder, imported into the store on first use
+    return fetch_user_nicknames([user_id], cache_folder)[int(user_id)]
@@ -0,0 +1,180 @@
+import os
+import json
+import random
+import struct
+from array import array
+from collections import Counter
+from oneliner_corpus import ONELINER_FOLDER, load_oneliners
+from pouet_nicknames import BBS_FOLDER, load_bbs_authors
+from pouet_fetch_all_dumps import POUET_INDEX_FILE, load_pouet_index
+
+CRAWL_STATE_FOLDER = "./crawl_state"
+PENDING, FOUND, NOT_FOUND = 0, 1, 2
+
+LOG_RECORD = struct.Struct("<IB")  # user id, state
+HEADER = struct.Struct("<I")  # number of ids tracked
+COMPACT_LOG_RECORDS = 20000
+
+
+class UserCrawlState:
+    # State of every user id in [0, max_user_id], two bits per id (a "found" bitmap and a
+    # "not found" bitmap, pending = neither), about 27 KB for 100k ids.
+    # users_state.bin is a snapshot of both bitmaps; every update is appended to users_state.log
+    # (5 bytes) and replayed on load, the snapshot is only rewritten when the log gets long.
+    # users_order.bin is a shuffled permutation of the ids, drawn in order without replacement.
+    def __init__(self, max_user_id, folder=CRAWL_STATE_FOLDER):
+        self.folder = folder
+        self.size = max_user_id + 1
+        self.snapshot_file = os.path.join(folder, "users_state.bin")
+        self.log_file = os.path.join(folder, "users_state.log")
+        self.order_file = os.path.join(folder, "users_order.bin")
+        os.makedirs(folder, exist_ok=True)
+
+        self.is_new = not os.path.exists(self.snapshot_file)
+        self.found = bytearray((self.size + 7) // 8)
+        self.not_found = bytearray((self.size + 7) // 8)
+        self.log_records = 0
+        self._load()
+        self.order = self._load_order()
+        self.log = open(self.log_file, "ab")
+        if self.is_new or self.log_records >= COMPACT_LOG_RECORDS:
+            self.compact()
+
+    def _load(self):
+        if not self.is_new:
+            with open(self.snapshot_file, "rb") as f:
+                data = f.read()
+            (size,) = HEADER.unpack_from(data)
+            length = (size + 7) // 8
+            # The id space may have grown since the snapshot: the new ids are pending
+            n = min(length, len(self.found))
+            self.found[:n] = data[HEADER.size:HEADER.size + n]
+            self.not_found[:n] = data[HEADER.size + length:HEADER.size + length + n]
+
+        if os.path.exists(self.log_file):
+            with open(self.log_file, "rb") as f:
+                data = f.read()
+            # A torn last record (crash while appending) is ignored
+            for offset in range(0, len(data) - len(data) % LOG_RECORD.size, LOG_RECORD.size):
+                user_id, state = LOG_RECORD.unpack_from(data, offset)
+                if user_id < self.size:
+                    self._set(user_id, state)
+                self.log_records += 1
+
+    def _load_order(self):
+        order = array("I")
+        if os.path.exists(self.order_file):
+            with open(self.order_file, "rb") as f:
+                order.frombytes(f.read())
+        if len(order) < self.size:
+            # New ids (max_user_id raised) are shuffled and appended after the existing permutation
+            new_ids = list(range(len(order), self.size))
+            random.shuffle(new_ids)
+            order.extend(new_ids)
+            with open(self.order_file + ".tmp", "wb") as f:
+                order.tofile(f)
+            os.replace(self.order_file + ".tmp", self.order_file)
+        return order
+
+    def _set(self, user_id, state):
+        byte, bit = user_id >> 3, 1 << (user_id & 7)
+        self.found[byte] &= ~bit & 0xFF
+        self.not_found[byte] &= ~bit & 0xFF
+        if state == FOUND:
+            self.found[byte] |= bit
+        elif state == NOT_FOUND:
+            self.not_found[byte] |= bit
+
+    def state(self, user_id):
+        byte, bit = user_id >> 3, 1 << (user_id & 7)
+        if self.found[byte] & bit:
+            return FOUND
+        if self.not_found[byte] & bit:
+            return NOT_FOUND
+        return PENDING
+
+    def mark(self, user_id, state):
+        if user_id >= self.size or self.state(user_id) == state:
+            return
+        self._set(user_id, state)
+        self.log.write(LOG_RECORD.pack(user_id, state))
+        self.log.flush()
+        self.log_records += 1
+
+    def pending_ids(self):
+        # Pending ids in the order of the persisted permutation. Ids marked while iterating
+        # are skipped, ids left pending (e.g. request errors) come back on the next pass.
+        for user_id in self.order:
+            if user_id < self.size and self.state(user_id) == PENDING:
+                yield user_id
+
+    def frontier_ids(self, activity):
+        # Crawl order: the pending ids already seen in the local corpora first, most active first,
+        # then blind probing of the remaining pending ids (most of which may not exist)
+        seeded = set()
+        for user_id, _ in sorted(activity.items(), key=lambda item: (-item[1], item[0])):
+            if user_id < self.size and self.state(user_id) == PENDING:
+                seeded.add(user_id)
+                yield user_id
+        for user_id in self.pending_ids():
+            if user_id not in seeded:
+                yield user_id
+
+    def counts(self):
+        found = sum(bin(byte).count("1") for byte in self.found)
+        not_found = sum(bin(byte).count("1") for byte in self.not_found)
+        return {"found": found, "not found": not_found, "pending": self.size - found - not_found}
+
+    def compact(self):
+        # Snapshot first, then the log is emptied: a crash in between only replays the log again
+        with open(self.snapshot_file + ".tmp", "wb") as f:
+            f.write(HEADER.pack(self.size))
+            f.write(self.found)
+            f.write(self.not_found)
+        os.replace(self.snapshot_file + ".tmp", self.snapshot_file)
+        self.log.close()
+        self.log = open(self.log_file, "wb")
+        self.log_records = 0
+
+    def close(self):
+        self.compact()
+        self.log.close()
+
+
+def seed_crawl_state(crawl_state, user_store, not_found_file=None):
+    # First run: ids already known from the user store and the legacy not_found_users.json
+    seeded = 0
+    for user_id, not_found in user_store.iter_known_ids():
+        crawl_state.mark(user_id, NOT_FOUND if not_found else FOUND)
+        seeded += 1
+    if not_found_file and os.path.exists(not_found_file):
+        with open(not_found_file, "r", encoding="utf-8") as f:
+            for user_id in json.load(f):
+                if crawl_state.state(user_id) == PENDING:
+                    crawl_state.mark(user_id, NOT_FOUND)
+                    seeded += 1
+    crawl_state.compact()
+    return seeded
+
+
+def local_user_activity(oneliners_df=None, bbs_folder=BBS_FOLDER, pouet_index_file=POUET_INDEX_FILE):
+    # {user_id: activity} of the users already known locally: oneliner messages (nick[id]),
+    # BBS posts (user_id) and prod credits from the dumps (pouet_fetch_all_dumps.py index).
+    # Each source is optional, a missing one is skipped.
+    activity = Counter()
+    if oneliners_df is None and os.path.isdir(ONELINER_FOLDER):
+        oneliners_df = load_oneliners()
+    if oneliners_df is not None:
+        activity.update(oneliners_df["pouet_id"].value_counts().to_dict())
+
+    bbs_authors = load_bbs_authors(bbs_folder)
+    activity.update(bbs_authors["pouet_id"].value_counts().to_dict())
+
+    if os.path.exists(pouet_index_file):
+        for user_id, prod_ids in load_pouet_index(pouet_index_file)["user_prods"].items():
+            if user_id.isdigit():
+                activity[int(user_id)] += len(prod_ids)
+
+    activity = Counter({int(user_id): int(count) for user_id, count in activity.items() if int(user_id) >= 0})
+    print(f"{len(activity)} user ids known from the oneliners, BBS posts and prod credits")
+    return activity
@@ -3,9 +3,10 @@ import json
 from datetime import datetime
 import pandas as pd
 import matplotlib.pyplot as plt
+from pouet_user import USER_STORE_FILE, USER_CACHE_FOLDER, open_user_store
 
 # Paths
-input_folder = "./pouet_users"
+input_folder = USER_CACHE_FOLDER  # Legacy per-user files, imported into the store on first run
 output_folder = "./stats"
 output_image_cumulative = os.path.join(output_folder, "users_cumulative.png")
 output_image_monthly = os.path.join(output_folder, "users_monthly_new.png")
@@ -16,19 +17,17 @@ os.makedirs(output_folder, exist_ok=True)
 # Store all registration dates
 register_dates = []
 
-# Iterate over JSON files
-for filename in os.listdir(input_folder):
-    if filename.endswith(".json"):
-        filepath = os.path.join(input_folder, filename)
-        try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                reg_date_str = data.get("user", {}).get("registerDate")
-                if reg_date_str:
-                    reg_date = datetime.strptime(reg_date_str, "%Y-%m-%d %H:%M:%S")
-                    register_dates.append(reg_date)
-        except (json.JSONDecodeError, KeyError, ValueError):
-            print(f"Skipping invalid file: {filename}")
+# Iterate over the users stored by pouet_user.py
+store = open_user_store(USER_STORE_FILE, input_folder)
+for raw_json in store.iter_raw_json():
+    try:
+        data = json.loads(raw_json)
+        reg_date_str = data.get("user", {}).get("registerDate")
+        if reg_date_str:
+            reg_date = datetime.strptime(reg_date_str, "%Y-%m-%d %H:%M:%S")
+            register_dates.append(reg_date)
+    except (json.JSONDecodeError, KeyError, ValueError, AttributeError):
+        print(f"Skipping invalid user record: {raw_json[:80]}")
 
 # Convert to DataFrame
 df = pd.DataFrame(register_dates, columns=["register_date"])
@@ -0,0 +1,54 @@
+import os
+import re
+import sys
+
+SCENE_ORG_FTP_ROOT = "ftp://ftp.scene.org/"
+SCENE_ORG_HTTP_ROOT = "https://files.scene.org/view/"
+
+
+def build_link_remapper(scene_org_local_copy, scene_org_roots, sep=os.sep):
+    # Compiles every known scene.org prefix into a single regex, built once per run:
+    # - ftp://ftp.scene.org/<mirror_root>... for each of the `scene_org_roots`
+    # - http(s)://files.scene.org/view/...
+    # Mirror roots are tried longest first, so "mirrors/hornet/" wins over a shorter root.
+    # Returns a function mapping a download URL to its path in the local copy (or None).
+    roots = sorted(set(scene_org_roots), key=len, reverse=True)
+    ftp_prefix = re.escape(SCENE_ORG_FTP_ROOT) + "(?:" + "|".join(re.escape(root) for root in roots) + ")"
+    http_prefix = r"https?://files\.scene\.org/view/"
+    if roots:
+        pattern = re.compile(f"(?:{ftp_prefix}|{http_prefix})")
+    else:
+        pattern = re.compile(http_prefix)
+
+    def remap(url):
+        match = pattern.search(url)
+        if not match:
+            return None
+        local_link = scene_org_local_copy + url[match.end():]
+        return local_link.replace("/", sep) if sep != "/" else local_link
+
+    return remap
+
+
+def remap_links(urls, remapper):
+    # Bulk remapping of any URL list, yields (url, local_link or None)
+    for url in urls:
+        yield url, remapper(url)
+
+
+if __name__ == "__main__":
+    # Usage: python scene_org_links.py urls.txt [local_copy] [root1,root2,...]
+    # Prints "url<TAB>local_link" for every URL that maps to the local copy.
+    if len(sys.argv) < 2:
+        print("Usage: python scene_org_links.py urls.txt [local_copy] [root1,root2,...]")
+        sys.exit(1)
+
+    scene_org_local_copy = sys.argv[2] if len(sys.argv) > 2 else "X:\\ftp.scene.org\\"
+    scene_org_roots = sys.argv[3].split(",") if len(sys.argv) > 3 else ["mirrors/hornet/", "pub/"]
+    remapper = build_link_remapper(scene_org_local_copy, scene_org_roots)
+
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        urls = (line.strip() for line in f if line.strip())
+        for url, local_link in remap_links(urls, remapper):
+            if local_link:
+                print(f"{url}\t{local_link}")
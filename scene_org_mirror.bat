@@ -0,0 +1,2 @@
+python scene_org_mirror.py
+pause
\ No newline at end of file
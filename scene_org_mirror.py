@@ -0,0 +1,155 @@
+import os
+import sys
+import gzip
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+MIRROR_INDEX_FILE = "db/_scene_org_mirror_index.json.gz"
+SCAN_WORKERS = 16
+
+LINK_PRESENT = "present"
+LINK_MISSING = "missing"
+LINK_EMPTY = "empty"
+
+
+def load_mirror_index(index_file=MIRROR_INDEX_FILE):
+    # Index layout: {"root": ..., "dirs": {rel_dir: {"mtime": ..., "files": {name: [size, mtime]}, "subdirs": [...]}}}
+    if not os.path.exists(index_file):
+        return None
+    try:
+        with gzip.open(index_file, 'rt', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Cannot read mirror index {index_file}: {e}")
+        return None
+
+
+def save_mirror_index(index, index_file=MIRROR_INDEX_FILE):
+    os.makedirs(os.path.dirname(index_file), exist_ok=True)
+    tmp_file = index_file + '.tmp'
+    with gzip.open(tmp_file, 'wt', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'))
+    os.replace(tmp_file, index_file)
+
+
+def _scan_dir(root, rel_dir, cached_entry):
+    # Lists one directory, unless its mtime did not change since the previous scan.
+    # Adding, removing or renaming an entry bumps the directory mtime, so an unchanged
+    # mtime means the cached file list is still valid (subdirectories are still visited).
+    path = os.path.join(root, rel_dir) if rel_dir else root
+    dir_mtime = os.stat(path).st_mtime
+    if cached_entry is not None and cached_entry["mtime"] == dir_mtime:
+        return rel_dir, cached_entry, False
+
+    files = {}
+    subdirs = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                elif entry.is_file(follow_symlinks=False):
+                    st = entry.stat(follow_symlinks=False)
+                    files[entry.name] = [st.st_size, int(st.st_mtime)]
+            except OSError:
+                continue
+    return rel_dir, {"mtime": dir_mtime, "files": files, "subdirs": sorted(subdirs)}, True
+
+
+def scan_mirror(root, previous_index=None, workers=SCAN_WORKERS):
+    # Walks the whole mirror once, with the directories spread over a thread pool
+    # (on a network share, the time is spent waiting for the server, not in Python).
+    # A directory that cannot be listed keeps its entry from the previous index; if it has none,
+    # the index is marked "incomplete" and must not replace a saved one.
+    # Raises OSError if the root itself cannot be listed (e.g. share unreachable).
+    previous_dirs = previous_index["dirs"] if previous_index and previous_index.get("root") == root else {}
+    if not os.path.isdir(root):
+        raise OSError(f"Mirror root {root} not found")
+    dirs = {}
+    rescanned = 0
+    incomplete = 0
+    start_time = time.time()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        root_future = executor.submit(_scan_dir, root, "", previous_dirs.get(""))
+        pending = {root_future}
+        futures_dir = {root_future: ""}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    rel_dir, entry, was_rescanned = future.result()
+                except OSError as e:
+                    rel_dir = futures_dir[future]
+                    if rel_dir == "":
+                        raise
+                    entry, was_rescanned = previous_dirs.get(rel_dir), False
+                    if entry is None:
+                        print(f"Cannot scan directory {rel_dir}: {e}")
+                        incomplete += 1
+                        continue
+                    print(f"Cannot scan directory {rel_dir}, keeping its previous listing: {e}")
+                dirs[rel_dir] = entry
+                rescanned += was_rescanned
+                for subdir in entry["subdirs"]:
+                    rel_subdir = f"{rel_dir}/{subdir}" if rel_dir else subdir
+                    subdir_future = executor.submit(_scan_dir, root, rel_subdir, previous_dirs.get(rel_subdir))
+                    futures_dir[subdir_future] = rel_subdir
+                    pending.add(subdir_future)
+
+    print(f"Mirror index: {len(dirs)} directories ({rescanned} rescanned) in {time.time() - start_time:.1f}s.")
+    index = {"root": root, "scanned_at": int(time.time()), "dirs": dirs}
+    if incomplete:
+        print(f"Mirror index incomplete: {incomplete} directories could not be scanned.")
+        index["incomplete"] = incomplete
+    return index
+
+
+def update_mirror_index(root, index_file=MIRROR_INDEX_FILE, workers=SCAN_WORKERS):
+    # The saved index is only replaced by a complete scan
+    index = scan_mirror(root, load_mirror_index(index_file), workers)
+    if not index.get("incomplete"):
+        save_mirror_index(index, index_file)
+    return index
+
+
+def build_mirror_lookup(index):
+    # Flattens the index into {normalized local path: size}, for O(1) link checks
+    lookup = {}
+    root = index["root"]
+    for rel_dir, entry in index["dirs"].items():
+        dir_path = os.path.join(root, *rel_dir.split("/")) if rel_dir else root
+        for name, (size, _) in entry["files"].items():
+            lookup[os.path.normcase(os.path.join(dir_path, name))] = size
+    return lookup
+
+
+def check_local_link(local_link, mirror_lookup):
+    # Only the presence of the file in the mirror index is checked, and that it is not empty
+    # (a truncated copy): the dumps carry no file size to compare with
+    size = mirror_lookup.get(os.path.normcase(local_link))
+    if size is None:
+        return LINK_MISSING
+    if size == 0:
+        return LINK_EMPTY
+    return LINK_PRESENT
+
+
+def print_link_report(platform_dict):
+    counts = {}
+    seen = set()
+    for prods in platform_dict.values():
+        for prod in prods:
+            if 'local_status' in prod and id(prod) not in seen:
+                seen.add(id(prod))
+                counts[prod['local_status']] = counts.get(prod['local_status'], 0) + 1
+    print("Local links: " + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+
+
+if __name__ == "__main__":
+    root = sys.argv[1] if len(sys.argv) > 1 else "X:\\ftp.scene.org\\"
+    try:
+        update_mirror_index(root)
+    except OSError as e:
+        print(f"Cannot scan the mirror: {e}")